@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+import sqlite3
 import uuid
+from functools import cache
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from passlib.hash import bcrypt
 
 from app.auth.dependencies import get_current_user, get_admin_user
 from app.auth.jwt import create_access_token
+from app.auth.password import hash_password, verify_password
 from app.config import get_settings
 from app.models.user import (
     LoginRequest,
@@ -19,15 +21,27 @@ from app.models.user import (
     UserUpdate,
     PasswordChange,
 )
-from app.storage.sqlite_client import get_db
+from app.storage.sqlite_client import get_db, run_sync
 
 router = APIRouter()
 
 
+def _user_out(row) -> UserOut:
+    """Build UserOut from a trusted users row without re-validation (SQLite stores is_active as 0/1)."""
+    d = dict(row)
+    d["is_active"] = bool(d["is_active"])
+    return UserOut.model_construct(**d)
+
+
+@cache
+def _auth_mode_response() -> dict:
+    # auth_mode 只来自 .env，运行期不会变化
+    return {"auth_mode": get_settings().auth_mode}
+
+
 @router.get("/mode")
 async def get_auth_mode():
-    settings = get_settings()
-    return {"auth_mode": settings.auth_mode}
+    return _auth_mode_response()
 
 
 @router.post("/login", response_model=Token)
@@ -43,7 +57,7 @@ async def login(req: LoginRequest):
     )
     user = await cursor.fetchone()
 
-    if user is None or not bcrypt.verify(req.password, user["password_hash"]):
+    if user is None or not await verify_password(req.password, user["password_hash"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户名或密码错误")
 
     if not user["is_active"]:
@@ -72,10 +86,10 @@ async def change_password(
     cursor = await db.execute("SELECT password_hash FROM users WHERE id = ?", (user.id,))
     row = await cursor.fetchone()
 
-    if row is None or not bcrypt.verify(req.old_password, row["password_hash"]):
+    if row is None or not await verify_password(req.old_password, row["password_hash"]):
         raise HTTPException(status_code=400, detail="原密码错误")
 
-    new_hash = bcrypt.hash(req.new_password)
+    new_hash = await hash_password(req.new_password)
     await db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_hash, user.id))
     await db.commit()
     return {"message": "密码修改成功"}
@@ -88,7 +102,7 @@ async def list_users(_: Annotated[UserOut, Depends(get_admin_user)]):
         "SELECT id, username, display_name, role, is_active, created_at, last_login_at FROM users ORDER BY created_at"
     )
     rows = await cursor.fetchall()
-    return [UserOut(**dict(r)) for r in rows]
+    return [_user_out(r) for r in rows]
 
 
 @router.post("/users", response_model=UserOut, status_code=201)
@@ -96,19 +110,20 @@ async def create_user(
     req: UserCreate,
     _: Annotated[UserOut, Depends(get_admin_user)],
 ):
-    db = await get_db()
-    cursor = await db.execute("SELECT id FROM users WHERE username = ?", (req.username,))
-    if await cursor.fetchone():
-        raise HTTPException(status_code=400, detail="用户名已存在")
-
     user_id = str(uuid.uuid4())
-    password_hash = bcrypt.hash(req.password)
+    password_hash = await hash_password(req.password)
 
-    await db.execute(
-        "INSERT INTO users (id, username, password_hash, display_name, role) VALUES (?, ?, ?, ?, ?)",
-        (user_id, req.username, password_hash, req.display_name or req.username, req.role),
-    )
-    await db.commit()
+    # username UNIQUE：冲突时不插入、不返回行，查重与写入合为一条语句
+    def _insert(conn: sqlite3.Connection):
+        return conn.execute(
+            "INSERT INTO users (id, username, password_hash, display_name, role) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(username) DO NOTHING RETURNING created_at",
+            (user_id, req.username, password_hash, req.display_name or req.username, req.role),
+        ).fetchone()
+
+    row = await run_sync(_insert)
+    if row is None:
+        raise HTTPException(status_code=400, detail="用户名已存在")
 
     return UserOut(
         id=user_id,
@@ -116,7 +131,7 @@ async def create_user(
         display_name=req.display_name or req.username,
         role=req.role,
         is_active=True,
-        created_at="",
+        created_at=row["created_at"],
         last_login_at=None,
     )
 
@@ -127,15 +142,6 @@ async def update_user(
     req: UserUpdate,
     _: Annotated[UserOut, Depends(get_admin_user)],
 ):
-    db = await get_db()
-    cursor = await db.execute(
-        "SELECT id, username, display_name, role, is_active, created_at, last_login_at FROM users WHERE id = ?",
-        (user_id,),
-    )
-    row = await cursor.fetchone()
-    if row is None:
-        raise HTTPException(status_code=404, detail="用户不存在")
-
     updates = {}
     if req.display_name is not None:
         updates["display_name"] = req.display_name
@@ -144,18 +150,20 @@ async def update_user(
     if req.is_active is not None:
         updates["is_active"] = req.is_active
 
-    if updates:
-        set_clause = ", ".join(f"{k} = ?" for k in updates)
-        values = list(updates.values()) + [user_id]
-        await db.execute(f"UPDATE users SET {set_clause} WHERE id = ?", values)
-        await db.commit()
-
-    cursor = await db.execute(
-        "SELECT id, username, display_name, role, is_active, created_at, last_login_at FROM users WHERE id = ?",
-        (user_id,),
-    )
-    updated = await cursor.fetchone()
-    return UserOut(**dict(updated))
+    def _update(conn: sqlite3.Connection):
+        if updates:
+            set_clause = ", ".join(f"{k} = ?" for k in updates)
+            values = list(updates.values()) + [user_id]
+            conn.execute(f"UPDATE users SET {set_clause} WHERE id = ?", values)
+        return conn.execute(
+            "SELECT id, username, display_name, role, is_active, created_at, last_login_at FROM users WHERE id = ?",
+            (user_id,),
+        ).fetchone()
+
+    updated = await run_sync(_update)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="用户不存在")
+    return _user_out(updated)
 
 
 @router.delete("/users/{user_id}")
@@ -166,7 +174,5 @@ async def delete_user(
     if user_id == admin.id:
         raise HTTPException(status_code=400, detail="不能删除自己")
 
-    db = await get_db()
-    await db.execute("DELETE FROM users WHERE id = ?", (user_id,))
-    await db.commit()
+    await run_sync(lambda conn: conn.execute("DELETE FROM users WHERE id = ?", (user_id,)))
     return {"message": "用户已删除"}
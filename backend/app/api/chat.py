@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
-import json
 import logging
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
@@ -16,9 +16,11 @@ from app.chat.conversation import (
     get_conversation_messages,
     add_message,
     delete_conversation,
+    conversations_etag,
+    messages_etag,
 )
-from app.chat.rag_pipeline import run_rag
-from app.chat.agent_runner import run_agent
+from app.chat.rag_pipeline import RAGContext, run_rag, run_rag_stream
+from app.chat.agent_runner import run_agent, run_agent_stream
 from app.services.llm_service import check_available
 
 logger = logging.getLogger(__name__)
@@ -122,46 +124,58 @@ async def send_message_stream(req: ChatRequest):
     history_dicts = [{"role": m["role"], "content": m["content"]} for m in history[:-1]]
 
     async def event_stream():
-        yield f"data: {json.dumps({'type': 'start', 'conversation_id': conv_id})}\n\n"
+        yield _sse({'type': 'start', 'conversation_id': conv_id})
 
         if req.mode == "agent":
-            result = await run_agent(req.message, history=history_dicts if history_dicts else None)
-            for tc in result.get("tool_calls", []):
-                yield f"data: {json.dumps({'type': 'tool_call', 'tool': tc['tool'], 'args': tc['arguments']}, ensure_ascii=False)}\n\n"
-            chunks = _split_into_chunks(result["answer"], 20)
-            for chunk in chunks:
-                yield f"data: {json.dumps({'type': 'token', 'content': chunk}, ensure_ascii=False)}\n\n"
+            answer = ""
+            async for event in run_agent_stream(req.message, history=history_dicts if history_dicts else None):
+                if event["type"] == "token":
+                    yield _sse({'type': 'token', 'content': event["content"]})
+                elif event["type"] == "preamble":
+                    yield _sse({'type': 'preamble', 'content': event["content"]})
+                elif event["type"] == "tool_call":
+                    yield _sse({'type': 'tool_call', 'tool': event['tool'], 'args': event['arguments']})
+                else:
+                    answer = event["answer"]
             try:
-                await add_message(conv_id, "assistant", result["answer"])
+                await add_message(conv_id, "assistant", answer)
             except Exception as e:
                 _raise_if_readonly(e)
                 raise
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield _sse({'type': 'done'})
         else:
-            ctx = await run_rag(req.message, history=history_dicts if history_dicts else None)
-            chunks = _split_into_chunks(ctx.answer, 20)
-            for chunk in chunks:
-                yield f"data: {json.dumps({'type': 'token', 'content': chunk}, ensure_ascii=False)}\n\n"
+            ctx = RAGContext(query=req.message, rewritten_query=req.message)
+            async for token in run_rag_stream(ctx, history=history_dicts if history_dicts else None):
+                yield _sse({'type': 'token', 'content': token})
             try:
                 await add_message(conv_id, "assistant", ctx.answer, sources=ctx.sources)
             except Exception as e:
                 _raise_if_readonly(e)
                 raise
-            yield f"data: {json.dumps({'type': 'sources', 'sources': ctx.sources}, ensure_ascii=False)}\n\n"
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+            yield _sse({'type': 'sources', 'sources': ctx.sources})
+            yield _sse({'type': 'done'})
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 @router.get("/conversations")
-async def list_all_conversations(limit: int = 50):
-    """List all conversations."""
-    return await list_conversations(limit=limit)
+async def list_all_conversations(request: Request, response: Response, limit: int = 50):
+    """List all conversations. Supports If-None-Match → 304 for polling clients."""
+    conversations = await list_conversations(limit=limit)
+    etag = conversations_etag(conversations, limit)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return conversations
 
 
 @router.get("/conversations/{conversation_id}/messages")
-async def get_messages(conversation_id: str):
-    """Get all messages in a conversation."""
+async def get_messages(conversation_id: str, request: Request, response: Response):
+    """Get all messages in a conversation. Supports If-None-Match → 304 for polling clients."""
+    etag = await messages_etag(conversation_id)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return await get_conversation_messages(conversation_id)
 
 
@@ -181,6 +195,11 @@ async def delete_conv(conversation_id: str):
     return {"deleted": True}
 
 
-def _split_into_chunks(text: str, size: int) -> list[str]:
-    """Split text into chunks for simulated streaming."""
-    return [text[i:i+size] for i in range(0, len(text), size)] if text else [""]
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse(payload: dict) -> bytes:
+    """Encode one SSE frame as UTF-8 bytes."""
+    return _SSE_PREFIX + orjson.dumps(payload) + _SSE_SUFFIX
+
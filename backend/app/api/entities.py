@@ -2,11 +2,12 @@
 
 from __future__ import annotations
 
-import hashlib
-import json
+import sqlite3
 import uuid
 from typing import Annotated
 
+import blake3
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.auth.dependencies import get_current_user
@@ -15,34 +16,49 @@ from app.models.entity import (
     EntityVersionOut, StatusTimelineEntry,
 )
 from app.models.user import UserOut
-from app.storage.sqlite_client import get_db
+from app.services.query_cache import query_cache
+from app.storage.sqlite_client import get_db, run_sync
 
 router = APIRouter()
 
+_SQL_ENTITY_TAGS = (
+    "SELECT et.entity_id, et.content_tag_ids, et.status_values, tt.path "
+    "FROM entity_tags et LEFT JOIN tag_tree tt ON et.tag_tree_id = tt.id "
+)
+_SQL_GET_ENTITY_TAGS = _SQL_ENTITY_TAGS + "WHERE et.entity_id = ? LIMIT 1"
+_SQL_GET_ENTITY = "SELECT * FROM entities WHERE id = ?"
+
+# list_entities 的 4 种过滤组合各对应固定 SQL 文本，保证语句缓存命中
+_SQL_LIST_ENTITIES: dict[tuple[bool, bool], str] = {
+    (False, False): "SELECT * FROM entities ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+    (True, False): "SELECT * FROM entities WHERE source = ? ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+    (False, True): "SELECT * FROM entities WHERE review_status = ? ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+    (True, True): (
+        "SELECT * FROM entities WHERE source = ? AND review_status = ? "
+        "ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+    ),
+}
+
 
 def _content_hash(content: str | None) -> str:
-    return hashlib.sha256((content or "").encode()).hexdigest()[:16]
+    # 仅用于变更检测：BLAKE3 的 SIMD 实现对大文本远快于 SHA-256，长度保持 16 位 hex
+    return blake3.blake3((content or "").encode()).hexdigest(length=8)
+
+
+def _dump_json(val) -> str:
+    return orjson.dumps(val).decode()
 
 
 def _parse_json(val: str | None) -> dict | list | None:
     if val is None:
         return None
     try:
-        return json.loads(val)
-    except (json.JSONDecodeError, TypeError):
+        return orjson.loads(val)
+    except (orjson.JSONDecodeError, TypeError):
         return None
 
 
-async def _get_entity_tags(db, entity_id: str) -> EntityTagsOut | None:
-    cursor = await db.execute(
-        "SELECT et.content_tag_ids, et.status_values, tt.path "
-        "FROM entity_tags et LEFT JOIN tag_tree tt ON et.tag_tree_id = tt.id "
-        "WHERE et.entity_id = ? LIMIT 1",
-        (entity_id,),
-    )
-    row = await cursor.fetchone()
-    if row is None:
-        return None
+def _tags_from_row(row) -> EntityTagsOut:
     return EntityTagsOut(
         folder_tag_path=row["path"],
         content_tags=_parse_json(row["content_tag_ids"]) or [],
@@ -50,11 +66,34 @@ async def _get_entity_tags(db, entity_id: str) -> EntityTagsOut | None:
     )
 
 
+async def _get_entity_tags(db, entity_id: str) -> EntityTagsOut | None:
+    cursor = await db.execute(_SQL_GET_ENTITY_TAGS, (entity_id,))
+    row = await cursor.fetchone()
+    return _tags_from_row(row) if row is not None else None
+
+
+async def _get_entity_tags_batch(db, entity_ids: list[str]) -> dict[str, EntityTagsOut]:
+    """Fetch tags for many entities in one query (first binding per entity, like _get_entity_tags)."""
+    if not entity_ids:
+        return {}
+    placeholders = ",".join("?" * len(entity_ids))
+    cursor = await db.execute(
+        _SQL_ENTITY_TAGS + f"WHERE et.entity_id IN ({placeholders})",
+        entity_ids,
+    )
+    tags_by_id: dict[str, EntityTagsOut] = {}
+    for row in await cursor.fetchall():
+        if row["entity_id"] in tags_by_id:
+            continue
+        tags_by_id[row["entity_id"]] = _tags_from_row(row)
+    return tags_by_id
+
+
 async def _to_entity_out(db, row) -> EntityOut:
     d = dict(row)
     d["metadata"] = _parse_json(d.get("metadata"))
     tags = await _get_entity_tags(db, d["id"])
-    return EntityOut(**d, tags=tags)
+    return EntityOut.model_construct(**d, tags=tags)
 
 
 # --- List & Get ---
@@ -68,26 +107,25 @@ async def list_entities(
     page_size: int = Query(default=20, ge=1, le=100),
 ):
     db = await get_db()
-    conditions = []
-    params = []
+    params: list = []
 
     if source:
-        conditions.append("source = ?")
         params.append(source)
     if review_status:
-        conditions.append("review_status = ?")
         params.append(review_status)
 
-    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     offset = (page - 1) * page_size
     params.extend([page_size, offset])
 
-    cursor = await db.execute(
-        f"SELECT * FROM entities {where} ORDER BY updated_at DESC LIMIT ? OFFSET ?",
-        params,
-    )
+    cursor = await db.execute(_SQL_LIST_ENTITIES[bool(source), bool(review_status)], params)
     rows = await cursor.fetchall()
-    return [await _to_entity_out(db, r) for r in rows]
+    tags_by_id = await _get_entity_tags_batch(db, [r["id"] for r in rows])
+    result = []
+    for r in rows:
+        d = dict(r)
+        d["metadata"] = _parse_json(d.get("metadata"))
+        result.append(EntityOut.model_construct(**d, tags=tags_by_id.get(d["id"])))
+    return result
 
 
 @router.get("/{entity_id}", response_model=EntityOut)
@@ -96,7 +134,7 @@ async def get_entity(
     _: Annotated[UserOut, Depends(get_current_user)],
 ):
     db = await get_db()
-    cursor = await db.execute("SELECT * FROM entities WHERE id = ?", (entity_id,))
+    cursor = await db.execute(_SQL_GET_ENTITY, (entity_id,))
     row = await cursor.fetchone()
     if row is None:
         raise HTTPException(status_code=404, detail="实体不存在")
@@ -110,40 +148,54 @@ async def create_entity(
     req: EntityCreate,
     user: Annotated[UserOut, Depends(get_current_user)],
 ):
-    db = await get_db()
     entity_id = str(uuid.uuid4())
-    meta_json = json.dumps(req.metadata, ensure_ascii=False) if req.metadata else None
+    meta_json = _dump_json(req.metadata) if req.metadata else None
     chash = _content_hash(req.content)
-
-    await db.execute(
-        """INSERT INTO entities
-           (id, source, source_id, title, content, content_type, metadata, content_hash, created_by)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (entity_id, req.source, req.source_id, req.title, req.content,
-         req.content_type, meta_json, chash, user.id),
-    )
-
-    # Save initial version
-    await db.execute(
-        """INSERT INTO entity_versions
-           (id, entity_id, version_number, title, content, metadata, change_source, change_summary)
-           VALUES (?, ?, 1, ?, ?, ?, 'create', '初始创建')""",
-        (str(uuid.uuid4()), entity_id, req.title, req.content, meta_json),
-    )
-
-    # Bind tags if provided
-    if req.folder_tag_id or req.content_tag_names or req.status_values:
-        ct_json = json.dumps(req.content_tag_names, ensure_ascii=False) if req.content_tag_names else None
-        sv_json = json.dumps(req.status_values, ensure_ascii=False) if req.status_values else None
-        await db.execute(
-            "INSERT INTO entity_tags (entity_id, tag_tree_id, content_tag_ids, status_values) VALUES (?, ?, ?, ?)",
-            (entity_id, req.folder_tag_id, ct_json, sv_json),
+    has_tags = bool(req.folder_tag_id or req.content_tag_names or req.status_values)
+    ct_json = _dump_json(req.content_tag_names) if req.content_tag_names else None
+    sv_json = _dump_json(req.status_values) if req.status_values else None
+
+    # 实体、初始版本、标签绑定在写线程内一次提交
+    def _create(conn: sqlite3.Connection):
+        row = conn.execute(
+            """INSERT INTO entities
+               (id, source, source_id, title, content, content_type, metadata, content_hash, created_by)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+               RETURNING *""",
+            (entity_id, req.source, req.source_id, req.title, req.content,
+             req.content_type, meta_json, chash, user.id),
+        ).fetchone()
+
+        # Save initial version
+        conn.execute(
+            """INSERT INTO entity_versions
+               (id, entity_id, version_number, title, content, metadata, change_source, change_summary)
+               VALUES (?, ?, 1, ?, ?, ?, 'create', '初始创建')""",
+            (str(uuid.uuid4()), entity_id, req.title, req.content, meta_json),
         )
 
-    await db.commit()
-
-    cursor = await db.execute("SELECT * FROM entities WHERE id = ?", (entity_id,))
-    return await _to_entity_out(db, await cursor.fetchone())
+        # Bind tags if provided
+        tag_row = None
+        if has_tags:
+            tag_row = conn.execute(
+                "INSERT INTO entity_tags (entity_id, tag_tree_id, content_tag_ids, status_values) VALUES (?, ?, ?, ?) "
+                "RETURNING (SELECT path FROM tag_tree WHERE id = tag_tree_id) AS path",
+                (entity_id, req.folder_tag_id, ct_json, sv_json),
+            ).fetchone()
+        return row, tag_row
+
+    row, tag_row = await run_sync(_create)
+
+    tags = None
+    if tag_row is not None:
+        tags = EntityTagsOut(
+            folder_tag_path=tag_row["path"],
+            content_tags=req.content_tag_names or [],
+            status_values=req.status_values or {},
+        )
+    d = dict(row)
+    d["metadata"] = req.metadata or None
+    return EntityOut(**d, tags=tags)
 
 
 # --- Update (creates new version) ---
@@ -154,40 +206,49 @@ async def update_entity(
     req: EntityUpdate,
     user: Annotated[UserOut, Depends(get_current_user)],
 ):
-    db = await get_db()
-    cursor = await db.execute("SELECT * FROM entities WHERE id = ?", (entity_id,))
-    existing = await cursor.fetchone()
-    if existing is None:
-        raise HTTPException(status_code=404, detail="实体不存在")
+    # 读取现状、写快照、更新实体在写线程内一次完成，读写之间不会插入其他写入
+    def _update(conn: sqlite3.Connection):
+        existing = conn.execute(_SQL_GET_ENTITY, (entity_id,)).fetchone()
+        if existing is None:
+            return None, None
+
+        new_title = req.title if req.title is not None else existing["title"]
+        new_content = req.content if req.content is not None else existing["content"]
+        new_meta = _dump_json(req.metadata) if req.metadata is not None else existing["metadata"]
+        new_version = existing["current_version"] + 1
+
+        # Save old version snapshot
+        tag_row = conn.execute(_SQL_GET_ENTITY_TAGS, (entity_id,)).fetchone()
+        tags = _tags_from_row(tag_row) if tag_row is not None else None
+        tags_snapshot = _dump_json(tags.model_dump() if tags else {})
+
+        conn.execute(
+            """INSERT INTO entity_versions
+               (id, entity_id, version_number, title, content, metadata, tags_snapshot, change_source, change_summary)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (str(uuid.uuid4()), entity_id, new_version, new_title, new_content,
+             new_meta, tags_snapshot, "web_edit", f"v{new_version} 更新"),
+        )
 
-    new_title = req.title if req.title is not None else existing["title"]
-    new_content = req.content if req.content is not None else existing["content"]
-    new_meta = json.dumps(req.metadata, ensure_ascii=False) if req.metadata is not None else existing["metadata"]
-    new_version = existing["current_version"] + 1
-    new_hash = _content_hash(new_content)
-
-    # Save old version snapshot
-    tags = await _get_entity_tags(db, entity_id)
-    tags_snapshot = json.dumps(tags.model_dump() if tags else {}, ensure_ascii=False)
-
-    await db.execute(
-        """INSERT INTO entity_versions
-           (id, entity_id, version_number, title, content, metadata, tags_snapshot, change_source, change_summary)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (str(uuid.uuid4()), entity_id, new_version, new_title, new_content,
-         new_meta, tags_snapshot, "web_edit", f"v{new_version} 更新"),
-    )
+        row = conn.execute(
+            """UPDATE entities SET title = ?, content = ?, metadata = ?,
+               current_version = ?, content_hash = ?, updated_at = datetime('now')
+               WHERE id = ?
+               RETURNING *""",
+            (new_title, new_content, new_meta, new_version, _content_hash(new_content), entity_id),
+        ).fetchone()
+        return row, tags
 
-    await db.execute(
-        """UPDATE entities SET title = ?, content = ?, metadata = ?,
-           current_version = ?, content_hash = ?, updated_at = datetime('now')
-           WHERE id = ?""",
-        (new_title, new_content, new_meta, new_version, new_hash, entity_id),
-    )
-    await db.commit()
+    row, tags = await run_sync(_update)
+    if row is None:
+        raise HTTPException(status_code=404, detail="实体不存在")
+    # 标题/内容已变，缓存的检索结果不再可信
+    query_cache.clear()
 
-    cursor = await db.execute("SELECT * FROM entities WHERE id = ?", (entity_id,))
-    return await _to_entity_out(db, await cursor.fetchone())
+    # Tags are untouched by this update, so the snapshot read above is still current
+    d = dict(row)
+    d["metadata"] = _parse_json(d.get("metadata"))
+    return EntityOut(**d, tags=tags)
 
 
 # --- Delete ---
@@ -197,9 +258,8 @@ async def delete_entity(
     entity_id: str,
     _: Annotated[UserOut, Depends(get_current_user)],
 ):
-    db = await get_db()
-    await db.execute("DELETE FROM entities WHERE id = ?", (entity_id,))
-    await db.commit()
+    await run_sync(lambda conn: conn.execute("DELETE FROM entities WHERE id = ?", (entity_id,)))
+    query_cache.clear()
     return {"message": "实体已删除"}
 
 
@@ -221,7 +281,7 @@ async def list_versions(
         d = dict(r)
         d["metadata"] = _parse_json(d.get("metadata"))
         d["tags_snapshot"] = _parse_json(d.get("tags_snapshot"))
-        result.append(EntityVersionOut(**d))
+        result.append(EntityVersionOut.model_construct(**d))
     return result
 
 
@@ -242,7 +302,7 @@ async def get_version(
     d = dict(row)
     d["metadata"] = _parse_json(d.get("metadata"))
     d["tags_snapshot"] = _parse_json(d.get("tags_snapshot"))
-    return EntityVersionOut(**d)
+    return EntityVersionOut.model_construct(**d)
 
 
 # --- Status Timeline ---
@@ -257,4 +317,4 @@ async def get_status_timeline(
         "SELECT * FROM status_timeline WHERE entity_id = ? ORDER BY changed_at DESC",
         (entity_id,),
     )
-    return [StatusTimelineEntry(**dict(r)) for r in await cursor.fetchall()]
+    return [StatusTimelineEntry.model_construct(**dict(r)) for r in await cursor.fetchall()]
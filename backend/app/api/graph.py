@@ -82,39 +82,35 @@ async def graph_overview(
     if not await is_available():
         raise HTTPException(503, "Neo4j 不可用")
 
-    node_results = await run_cypher(
+    results = await run_cypher(
         """MATCH (e:Entity)
-           RETURN e.entity_id as id, e.title as title, e.source as source, labels(e) as labels
-           ORDER BY e.title
-           LIMIT $limit""",
+           WITH e ORDER BY e.title LIMIT $limit
+           WITH collect(e) AS nodes
+           UNWIND nodes AS n
+           OPTIONAL MATCH (n)-[r]->(m:Entity)
+           WHERE m IN nodes
+           WITH nodes, collect(
+               CASE WHEN r IS NULL THEN NULL
+                    ELSE {from_id: n.entity_id, to_id: m.entity_id, rel_type: type(r)} END
+           )[..500] AS edges
+           RETURN [x IN nodes | {id: x.entity_id, title: x.title, source: x.source, labels: labels(x)}] AS nodes,
+                  edges""",
         {"limit": limit},
     )
+    if not results:
+        return GraphData(nodes=[], edges=[])
 
-    nodes = []
-    node_ids = set()
-    for r in node_results:
-        nid = r.get("id", "")
-        if nid:
-            nodes.append(GraphNode(
-                id=nid,
-                title=r.get("title", ""),
-                source=r.get("source", ""),
-                labels=r.get("labels", []),
-            ))
-            node_ids.add(nid)
-
-    edge_results = await run_cypher(
-        """MATCH (a:Entity)-[r]->(b:Entity)
-           WHERE a.entity_id IN $ids AND b.entity_id IN $ids
-           RETURN a.entity_id as from_id, b.entity_id as to_id, type(r) as rel_type
-           LIMIT 500""",
-        {"ids": list(node_ids)},
-    )
+    nodes = [GraphNode(
+        id=r["id"],
+        title=r.get("title") or "",
+        source=r.get("source") or "",
+        labels=r.get("labels") or [],
+    ) for r in results[0]["nodes"] if r.get("id")]
 
     edges = [GraphEdge(
         source=r.get("from_id", ""),
         target=r.get("to_id", ""),
         type=r.get("rel_type", "RELATED_TO"),
-    ) for r in edge_results]
+    ) for r in results[0]["edges"]]
 
     return GraphData(nodes=nodes, edges=edges)
@@ -2,8 +2,7 @@
 
 from __future__ import annotations
 
-import json
-
+import orjson
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
@@ -11,6 +10,8 @@ from app.storage.sqlite_client import get_db
 
 router = APIRouter()
 
+_SQL_GET_VERSION = "SELECT * FROM entity_versions WHERE entity_id = ? AND version_number = ?"
+
 
 class VersionItem(BaseModel):
     id: str
@@ -62,11 +63,7 @@ async def list_versions(entity_id: str):
 async def get_version(entity_id: str, version_number: int):
     """Get a specific version's full content."""
     db = await get_db()
-    cursor = await db.execute(
-        """SELECT * FROM entity_versions
-           WHERE entity_id = ? AND version_number = ?""",
-        (entity_id, version_number),
-    )
+    cursor = await db.execute(_SQL_GET_VERSION, (entity_id, version_number))
     row = await cursor.fetchone()
     if not row:
         raise HTTPException(404, "版本不存在")
@@ -75,8 +72,8 @@ async def get_version(entity_id: str, version_number: int):
     for key in ("metadata", "tags_snapshot"):
         if result.get(key) and isinstance(result[key], str):
             try:
-                result[key] = json.loads(result[key])
-            except json.JSONDecodeError:
+                result[key] = orjson.loads(result[key])
+            except orjson.JSONDecodeError:
                 pass
     return result
 
@@ -91,10 +88,7 @@ async def version_diff(
     db = await get_db()
 
     async def _get_version(vnum: int) -> dict:
-        cursor = await db.execute(
-            "SELECT * FROM entity_versions WHERE entity_id = ? AND version_number = ?",
-            (entity_id, vnum),
-        )
+        cursor = await db.execute(_SQL_GET_VERSION, (entity_id, vnum))
         row = await cursor.fetchone()
         if not row:
             raise HTTPException(404, f"版本 {vnum} 不存在")
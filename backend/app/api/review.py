@@ -43,7 +43,7 @@ async def list_pending_reviews(
 async def get_pending_count(
     _: Annotated[UserOut, Depends(get_current_user)],
 ):
-    count = await review_service.get_pending_count()
+    count = await review_service.get_pending_count_cached()
     return {"count": count}
 
 
@@ -52,7 +52,7 @@ async def get_review_stats(
     _: Annotated[UserOut, Depends(get_current_user)],
 ):
     """Get counts by status."""
-    return await review_service.get_stats()
+    return await review_service.get_stats_cached()
 
 
 @router.post("/{review_id}/approve")
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
-from app.services.embedding_service import semantic_search
-from app.storage.sqlite_client import get_db
+from app.config import get_settings
+from app.services.embedding_service import cached_semantic_search
+from app.services.keyword_search import keyword_search
+from app.services.query_cache import query_cache
 
 router = APIRouter()
 
@@ -28,7 +32,7 @@ class SearchResponse(BaseModel):
     message: str | None = None  # 当向量检索不可用等时给出说明
 
 
-@router.get("", response_model=SearchResponse)
+@router.get("", response_model=SearchResponse, response_model_exclude_none=True)
 async def search(
     q: str = Query(..., min_length=1, description="搜索查询"),
     top_k: int = Query(default=10, ge=1, le=50),
@@ -38,86 +42,100 @@ async def search(
     mode: str = Query(default="hybrid", description="搜索模式: vector/metadata/hybrid"),
 ):
     """Hybrid semantic search across all data stores."""
-    results: list[SearchResult] = []
     message: str | None = None
 
-    if mode in ("vector", "hybrid"):
-        try:
-            vector_hits = await semantic_search(
-                q, top_k=top_k, source_filter=source,
-                folder_filter=folder, tag_filter=tag,
-            )
-        except Exception:
-            vector_hits = []
-            message = (
-                "向量检索暂不可用（Milvus 或 Embedding 服务异常），仅展示关键词匹配结果。"
-                "请检查：1) 设置中 LLM 是否已连接 2) Milvus 是否已启动 3) 是否有已审核并向量化的实体。"
-            )
-        else:
-            vector_hits = vector_hits or []
-        for hit in vector_hits:
-            results.append(SearchResult(
-                entity_id=hit["entity_id"],
-                title=hit.get("title"),
-                content=hit.get("content", "")[:300],
-                source=hit.get("source"),
-                obsidian_path=hit.get("obsidian_path"),
-                distance=hit.get("distance"),
-                match_type="vector",
-            ))
-
-    if mode in ("metadata", "hybrid"):
-        meta_hits = await _metadata_search(q, top_k=top_k, source=source)
-        seen_ids = {r.entity_id for r in results}
-        for hit in meta_hits:
-            if hit["id"] not in seen_ids:
-                results.append(SearchResult(
-                    entity_id=hit["id"],
-                    title=hit.get("title"),
-                    content=hit.get("content", "")[:300],
-                    source=hit.get("source"),
-                    obsidian_path=hit.get("obsidian_path"),
-                    match_type="metadata",
-                ))
+    # 向量检索与关键词检索互不依赖，并发执行：hybrid 延迟取两者最大值而非之和
+    vector_task = (
+        asyncio.create_task(
+            cached_semantic_search(q, top_k=top_k, source_filter=source, folder_filter=folder, tag_filter=tag)
+        )
+        if mode in ("vector", "hybrid") else None
+    )
+    meta_task = (
+        asyncio.create_task(keyword_search(q, top_k=top_k, source=source))
+        if mode in ("metadata", "hybrid") else None
+    )
+
+    try:
+        vector_hits: list[dict] = []
+        if vector_task is not None:
+            try:
+                vector_hits = await vector_task
+            except Exception:
+                message = (
+                    "向量检索暂不可用（Milvus 或 Embedding 服务异常），仅展示关键词匹配结果。"
+                    "请检查：1) 设置中 LLM 是否已连接 2) Milvus 是否已启动 3) 是否有已审核并向量化的实体。"
+                )
+
+        # 向量结果已足够可信时不再等待关键词检索
+        if meta_task is not None and mode == "hybrid" and _vector_is_confident(vector_hits, top_k):
+            meta_task.cancel()
+            meta_task = None
+        meta_hits = await meta_task if meta_task is not None else []
+    finally:
+        for task in (vector_task, meta_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+    # 内部数据已是可信类型，跳过逐字段校验
+    vector_results = [
+        SearchResult.model_construct(
+            entity_id=hit["entity_id"],
+            title=hit.get("title"),
+            content=(hit.get("content") or "")[:300],
+            source=hit.get("source"),
+            obsidian_path=hit.get("obsidian_path"),
+            distance=hit.get("distance"),
+            match_type="vector",
+        )
+        for hit in vector_hits or []
+    ]
+    meta_results = [
+        SearchResult.model_construct(
+            entity_id=hit["id"],
+            title=hit.get("title"),
+            content=(hit.get("content") or "")[:300],
+            source=hit.get("source"),
+            obsidian_path=hit.get("obsidian_path"),
+            match_type="metadata",
+        )
+        for hit in meta_hits
+    ]
 
     if mode == "hybrid":
-        results = _rrf_merge(results, top_k)
+        results = _rrf_merge([vector_results, meta_results], top_k)
+    else:
+        results = vector_results or meta_results
 
     return SearchResponse(query=q, results=results[:top_k], total=len(results), message=message)
 
 
-async def _metadata_search(query: str, top_k: int = 10, source: str | None = None) -> list[dict]:
-    """SQLite full-text search on title and content."""
-    db = await get_db()
-    params: list = []
-    where_clauses = ["(title LIKE ? OR content LIKE ?)"]
-    params.extend([f"%{query}%", f"%{query}%"])
+@router.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters of the semantic search cache."""
+    return query_cache.stats()
 
-    if source:
-        where_clauses.append("source = ?")
-        params.append(source)
 
-    sql = f"""SELECT id, title, substr(content, 1, 300) as content, source, obsidian_path
-              FROM entities
-              WHERE {' AND '.join(where_clauses)}
-              ORDER BY updated_at DESC
-              LIMIT ?"""
-    params.append(top_k)
+def _vector_is_confident(hits: list[dict], top_k: int) -> bool:
+    """A full page of vector hits whose best match clears the configured similarity threshold.
 
-    cursor = await db.execute(sql, params)
-    return [dict(r) for r in await cursor.fetchall()]
+    Milvus 使用 COSINE 度量，hit["distance"] 实为相似度（越大越相似）。
+    """
+    if len(hits) < top_k:
+        return False
+    return (hits[0].get("distance") or 0.0) >= get_settings().hybrid_vector_confidence_threshold
 
 
-def _rrf_merge(results: list[SearchResult], top_k: int, k: int = 60) -> list[SearchResult]:
-    """Reciprocal Rank Fusion to merge vector and metadata results."""
+def _rrf_merge(ranked_lists: list[list[SearchResult]], top_k: int, k: int = 60) -> list[SearchResult]:
+    """Reciprocal Rank Fusion: sum 1/(k + rank) over each retriever's own ranking."""
     scores: dict[str, float] = {}
     result_map: dict[str, SearchResult] = {}
 
-    for rank, r in enumerate(results):
-        rrf_score = 1.0 / (k + rank + 1)
-        scores[r.entity_id] = scores.get(r.entity_id, 0) + rrf_score
-        if r.entity_id not in result_map:
-            result_map[r.entity_id] = r
+    for ranked in ranked_lists:
+        for rank, r in enumerate(ranked, start=1):
+            scores[r.entity_id] = scores.get(r.entity_id, 0) + 1.0 / (k + rank)
+            if r.entity_id not in result_map:
+                result_map[r.entity_id] = r
 
     sorted_ids = sorted(scores, key=lambda x: scores[x], reverse=True)
     return [result_map[eid] for eid in sorted_ids[:top_k]]
@@ -4,15 +4,17 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Response
 from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_user, get_admin_user
 from app.models.user import UserOut
 from app.config import get_settings, get_user_config
-from app.services.llm_service import check_available
+from app.services.llm_service import check_available, close_client
 from app.api.version import get_local_version
 
 router = APIRouter()
@@ -105,7 +107,7 @@ async def update_llm_config(
     user_cfg.save()
 
     # Clear cached settings so new values take effect
-    _reload_settings(llm_cfg)
+    await _reload_settings(llm_cfg)
 
     logger.info("LLM config updated via API")
     return {"message": "LLM 配置已更新", "config": {**llm_cfg, "api_key": _mask_key(llm_cfg.get("api_key", ""))}}
@@ -142,9 +144,28 @@ async def update_paths_config(
     return {"message": "路径配置已更新"}
 
 
+# /system-info 常被前端轮询：整体结果缓存 5 秒，外部服务探测在窗口内最多执行一次
+_SYSINFO_TTL = 5.0
+# entities 的 COUNT(*) 需全表扫描，单独缓存更久
+_ENTITY_COUNT_TTL = 30.0
+_sysinfo_cache: dict = {"ts": 0.0, "body": None}
+_entity_count_cache: dict = {"ts": 0.0, "value": 0}
+_sysinfo_lock = asyncio.Lock()
+
+
 @router.get("/system-info")
 async def get_system_info(_: Annotated[UserOut, Depends(get_current_user)]):
     """Get comprehensive system information."""
+    async with _sysinfo_lock:
+        now = time.monotonic()
+        if _sysinfo_cache["body"] is None or now - _sysinfo_cache["ts"] >= _SYSINFO_TTL:
+            # 缓存序列化后的字节，窗口内命中时无需再次编码
+            _sysinfo_cache["body"] = orjson.dumps(await _collect_system_info())
+            _sysinfo_cache["ts"] = time.monotonic()
+        return Response(content=_sysinfo_cache["body"], media_type="application/json")
+
+
+async def _collect_system_info() -> dict:
     settings = get_settings()
 
     # Fetch external service stats with timeouts to avoid blocking
@@ -174,17 +195,20 @@ async def get_system_info(_: Annotated[UserOut, Depends(get_current_user)]):
         _safe_milvus(), _safe_neo4j(), _safe_llm()
     )
 
-    from app.storage.sqlite_client import get_db
-    db = await get_db()
-    cursor = await db.execute("SELECT COUNT(*) as cnt FROM entities")
-    entity_count = (await cursor.fetchone())["cnt"]
-    cursor = await db.execute("SELECT COUNT(*) as cnt FROM review_queue WHERE status = 'pending'")
-    pending_count = (await cursor.fetchone())["cnt"]
-    try:
-        cursor = await db.execute("SELECT COUNT(*) as cnt FROM conversations")
-        conv_count = (await cursor.fetchone())["cnt"]
-    except Exception:
-        conv_count = 0
+    from app.storage.sqlite_client import read_db
+    async with read_db() as db:
+        if time.monotonic() - _entity_count_cache["ts"] >= _ENTITY_COUNT_TTL:
+            cursor = await db.execute("SELECT COUNT(*) as cnt FROM entities")
+            _entity_count_cache["value"] = (await cursor.fetchone())["cnt"]
+            _entity_count_cache["ts"] = time.monotonic()
+        entity_count = _entity_count_cache["value"]
+        cursor = await db.execute("SELECT COUNT(*) as cnt FROM review_queue WHERE status = 'pending'")
+        pending_count = (await cursor.fetchone())["cnt"]
+        try:
+            cursor = await db.execute("SELECT COUNT(*) as cnt FROM conversations")
+            conv_count = (await cursor.fetchone())["cnt"]
+        except Exception:
+            conv_count = 0
 
     return {
         "version": get_local_version(),
@@ -214,7 +238,7 @@ async def re_vectorize(_: Annotated[UserOut, Depends(get_admin_user)]):
     return result
 
 
-def _reload_settings(llm_cfg: dict):
+async def _reload_settings(llm_cfg: dict):
     """Apply LLM config changes to the running settings."""
     settings = get_settings()
     if "api_url" in llm_cfg:
@@ -226,10 +250,5 @@ def _reload_settings(llm_cfg: dict):
     if "embedding_dim" in llm_cfg:
         settings.embedding_dim = llm_cfg["embedding_dim"]
 
-    # Reset LLM client to pick up new URL/key
-    import asyncio
-    from app.services.llm_service import close_client
-    try:
-        asyncio.get_event_loop().create_task(close_client())
-    except Exception:
-        pass
+    # Reset LLM client to pick up new URL/key; awaited so the response implies the old pool is closed
+    await close_client()
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import uuid
@@ -12,18 +13,15 @@ from pydantic import BaseModel
 
 from app.auth.dependencies import get_current_user, get_admin_user
 from app.models.user import UserOut
-from app.config import get_settings, get_user_config
-from app.sync.messages import APPLE_JXA_USER_MESSAGE
+from app.config import get_user_config
+from app.services import config_writer
+from app.services.file_processor import get_upload_dir, save_upload
+from app.sync import jobs as sync_jobs
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-_sync_status: dict = {
-    "apple_notes": {"running": False, "last_run": None, "last_result": None},
-    "apple_reminders": {"running": False, "last_run": None, "last_result": None},
-    "apple_calendar": {"running": False, "last_run": None, "last_result": None},
-}
-
+SYNC_SOURCES = ("apple_notes", "apple_reminders", "apple_calendar")
 
 @router.get("/status")
 async def get_sync_status(_: Annotated[UserOut, Depends(get_current_user)]):
@@ -37,7 +35,7 @@ async def get_sync_status(_: Annotated[UserOut, Depends(get_current_user)]):
             "sources": apple_cfg.get("sources", {}),
             "sync_scope": apple_cfg.get("sync_scope", {}),
         },
-        "status": _sync_status,
+        "status": await sync_jobs.get_status(SYNC_SOURCES),
     }
 
 
@@ -57,7 +55,7 @@ async def list_apple_reminder_lists(_: Annotated[UserOut, Depends(get_current_us
     return {"lists": lists}
 
 
-@router.post("/trigger/{source}")
+@router.post("/trigger/{source}", status_code=202)
 async def trigger_sync(
     source: str,
     user: Annotated[UserOut, Depends(get_current_user)],
@@ -73,81 +71,45 @@ async def trigger_sync(
     due_after: str = Query(default="", description="待办截止范围起 ISO 日期"),
     due_before: str = Query(default="", description="待办截止范围止 ISO 日期"),
 ):
-    """Manually trigger sync. Optional: note folders, calendar range, reminder lists + due range."""
-    from app.sync.ingest_pipeline import (
-        ingest_apple_notes, ingest_apple_reminders, ingest_apple_calendar,
-    )
-
-    valid_sources = {
-        "apple_notes": ingest_apple_notes,
-        "apple_reminders": ingest_apple_reminders,
-        "apple_calendar": ingest_apple_calendar,
-    }
+    """Start a sync job in the background and return its job id; poll /jobs/{job_id} or /status.
 
-    if source not in valid_sources:
+    Optional: note folders, calendar range, reminder lists + due range.
+    """
+    if source not in SYNC_SOURCES:
         raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
 
-    if _sync_status[source]["running"]:
-        raise HTTPException(status_code=409, detail=f"{source} sync already running")
-
-    _sync_status[source]["running"] = True
-    try:
-        if source == "apple_notes":
-            folders = [s.strip() for s in folder_whitelist.split(",") if s.strip()] or None
-            results = await ingest_apple_notes(limit=limit, order=order, folder_whitelist=folders)
-        elif source == "apple_reminders":
-            lists = [s.strip() for s in list_names.split(",") if s.strip()] or None
-            results = await ingest_apple_reminders(
-                limit=limit, order=order,
-                list_names=lists,
-                due_after=due_after.strip() or None,
-                due_before=due_before.strip() or None,
-            )
-        elif source == "apple_calendar":
-            results = await ingest_apple_calendar(
-                limit=limit, order=order,
-                days_back=days_back, days_forward=days_forward,
-            )
-        else:
-            results = []
-        from datetime import datetime
-        _sync_status[source]["last_run"] = datetime.now().isoformat()
-        _sync_status[source]["last_result"] = {
-            "total": len(results),
-            "created": sum(1 for r in results if r.get("status") == "created"),
-            "updated": sum(1 for r in results if r.get("status") == "updated"),
-            "skipped": sum(1 for r in results if r.get("status") == "skipped"),
-        }
-        # 持久化本次同步范围，供下次手动同步预填与定时同步使用
-        user_config = get_user_config()
-        apple_cfg = user_config.get("apple_sync", {})
-        scope = apple_cfg.get("sync_scope", {})
-        scope[source] = {
-            "limit": limit,
-            "order": order,
-            "folder_whitelist": folder_whitelist if source == "apple_notes" else "",
-            "days_back": days_back if source == "apple_calendar" else 30,
-            "days_forward": days_forward if source == "apple_calendar" else 90,
-            "list_names": list_names if source == "apple_reminders" else "",
-            "due_after": due_after.strip() if source == "apple_reminders" else "",
-            "due_before": due_before.strip() if source == "apple_reminders" else "",
+    if source == "apple_notes":
+        folders = [s.strip() for s in folder_whitelist.split(",") if s.strip()] or None
+        kwargs = {"folder_whitelist": folders}
+    elif source == "apple_reminders":
+        lists = [s.strip() for s in list_names.split(",") if s.strip()] or None
+        kwargs = {
+            "list_names": lists,
+            "due_after": due_after.strip() or None,
+            "due_before": due_before.strip() or None,
         }
-        apple_cfg["sync_scope"] = scope
-        user_config.set("apple_sync", apple_cfg)
-        user_config.save()
-        return {
-            "message": f"{source} sync completed",
-            "results": _sync_status[source]["last_result"],
-        }
-    except Exception as e:
-        logger.error("Sync %s failed: %s", source, e)
-        detail = APPLE_JXA_USER_MESSAGE if _is_apple_jxa_error(e) else str(e)
-        raise HTTPException(status_code=503, detail=detail)
-    finally:
-        _sync_status[source]["running"] = False
+    else:
+        kwargs = {"days_back": days_back, "days_forward": days_forward}
+
+    # 本次同步范围，任务成功后持久化，供下次手动同步预填与定时同步使用
+    scope = {
+        "limit": limit,
+        "order": order,
+        "folder_whitelist": folder_whitelist if source == "apple_notes" else "",
+        "days_back": days_back if source == "apple_calendar" else 30,
+        "days_forward": days_forward if source == "apple_calendar" else 90,
+        "list_names": list_names if source == "apple_reminders" else "",
+        "due_after": due_after.strip() if source == "apple_reminders" else "",
+        "due_before": due_before.strip() if source == "apple_reminders" else "",
+    }
+
+    job_id = await sync_jobs.start(source, {"limit": limit, "order": order, **kwargs}, scope=scope)
+    if job_id is None:
+        raise HTTPException(status_code=409, detail=f"{source} sync already running")
+    return {"message": f"{source} sync started", "job_id": job_id}
 
 
-@router.post("/trigger-all")
+@router.post("/trigger-all", status_code=202)
 async def trigger_all_sync(
     user: Annotated[UserOut, Depends(get_current_user)],
     limit: int = Query(default=20, ge=1, le=500),
@@ -157,34 +119,30 @@ async def trigger_all_sync(
     apple_cfg = config.get("apple_sync", {})
     sources = apple_cfg.get("sources", {})
 
+    # 各来源作为独立后台任务并发执行；已在运行的来源跳过，避免重复启动
     results = {}
     for source_key, enabled in sources.items():
+        source_name = f"apple_{source_key}"
         if not enabled:
             results[source_key] = {"status": "disabled"}
+        elif source_name not in SYNC_SOURCES:
             continue
-        source_name = f"apple_{source_key}"
-        try:
-            from app.sync.ingest_pipeline import (
-                ingest_apple_notes, ingest_apple_reminders, ingest_apple_calendar,
-            )
-            fn_map = {
-                "apple_notes": ingest_apple_notes,
-                "apple_reminders": ingest_apple_reminders,
-                "apple_calendar": ingest_apple_calendar,
-            }
-            if source_name in fn_map:
-                res = await fn_map[source_name](limit=limit, order=order)
-                results[source_key] = {
-                    "status": "ok",
-                    "total": len(res),
-                    "created": sum(1 for r in res if r.get("status") == "created"),
-                }
-        except Exception as e:
-            results[source_key] = {"status": "error", "detail": str(e)}
+        elif job_id := await sync_jobs.start(source_name, {"limit": limit, "order": order}):
+            results[source_key] = {"status": "started", "job_id": job_id}
+        else:
+            results[source_key] = {"status": "error", "detail": f"{source_name} sync already running"}
 
     return {"results": results}
 
 
+@router.get("/jobs/{job_id}")
+async def get_sync_job(job_id: str, _: Annotated[UserOut, Depends(get_current_user)]):
+    job = await sync_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="同步任务不存在")
+    return job
+
+
 @router.post("/upload")
 async def upload_and_ingest(
     file: UploadFile = File(...),
@@ -192,16 +150,14 @@ async def upload_and_ingest(
 ):
     from app.sync.ingest_pipeline import ingest_uploaded_file
 
-    settings = get_settings()
-    upload_dir = settings.resolved_data_dir / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir = get_upload_dir()
 
     ext = os.path.splitext(file.filename or "file")[1]
     saved_name = f"{uuid.uuid4()}{ext}"
     saved_path = upload_dir / saved_name
 
-    content = await file.read()
-    saved_path.write_bytes(content)
+    # 分块拷贝上传的临时文件，内存占用 O(块大小)；整个拷贝在线程中完成，不阻塞事件循环
+    file_sha = await asyncio.to_thread(save_upload, file.file, saved_path)
 
     try:
         result = await ingest_uploaded_file(
@@ -209,6 +165,7 @@ async def upload_and_ingest(
             original_filename=file.filename or "file",
             content_type=file.content_type or "application/octet-stream",
             created_by=user.id if user else "upload",
+            file_sha=file_sha,
         )
         return result
     except Exception as e:
@@ -240,11 +197,6 @@ class CreateEventRequest(BaseModel):
     all_day: bool = False
 
 
-def _is_apple_jxa_error(e: Exception) -> bool:
-    s = str(e).lower()
-    return "jxa" in s or "osascript" in s or "apple notes" in s or "apple reminders" in s or "apple calendar" in s
-
-
 @router.post("/create/note")
 async def create_apple_note(
     req: CreateNoteRequest,
@@ -252,13 +204,8 @@ async def create_apple_note(
 ):
     """Create a new note in Apple Notes app."""
     from app.sync.apple_notes import create_note
-    try:
-        result = await create_note(title=req.title, body=req.body, folder=req.folder)
-        return {"message": "备忘录已创建", "result": result}
-    except Exception as e:
-        logger.exception("Create Apple note failed")
-        detail = APPLE_JXA_USER_MESSAGE if _is_apple_jxa_error(e) else str(e)
-        raise HTTPException(status_code=503, detail=detail)
+    result = await create_note(title=req.title, body=req.body, folder=req.folder)
+    return {"message": "备忘录已创建", "result": result}
 
 
 @router.post("/create/reminder")
@@ -268,16 +215,11 @@ async def create_apple_reminder(
 ):
     """Create a new reminder in Apple Reminders app."""
     from app.sync.apple_reminders import create_reminder
-    try:
-        result = await create_reminder(
-            title=req.title, body=req.body, list_name=req.list_name,
-            due_date=req.due_date, priority=req.priority,
-        )
-        return {"message": "提醒事项已创建", "result": result}
-    except Exception as e:
-        logger.exception("Create Apple reminder failed")
-        detail = APPLE_JXA_USER_MESSAGE if _is_apple_jxa_error(e) else str(e)
-        raise HTTPException(status_code=503, detail=detail)
+    result = await create_reminder(
+        title=req.title, body=req.body, list_name=req.list_name,
+        due_date=req.due_date, priority=req.priority,
+    )
+    return {"message": "提醒事项已创建", "result": result}
 
 
 @router.post("/create/event")
@@ -293,11 +235,9 @@ async def create_apple_event(
             description=req.description, location=req.location,
             calendar=req.calendar, all_day=req.all_day,
         )
-        return {"message": "日历事件已创建", "result": result}
-    except Exception as e:
-        logger.exception("Create Apple event failed")
-        detail = APPLE_JXA_USER_MESSAGE if _is_apple_jxa_error(e) else str(e)
-        raise HTTPException(status_code=503, detail=detail)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "日历事件已创建", "result": result}
 
 
 @router.put("/config")
@@ -308,6 +248,5 @@ async def update_sync_config(
     user_config = get_user_config()
     current = user_config.get("apple_sync", {})
     current.update(config_update)
-    user_config.set("apple_sync", current)
-    user_config.save()
+    await config_writer.submit("apple_sync", current)
     return {"message": "配置已更新", "config": current}
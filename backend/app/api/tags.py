@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import json
 import uuid
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
 
 from app.auth.dependencies import get_current_user, get_admin_user
 from app.models.tag import (
@@ -15,7 +15,7 @@ from app.models.tag import (
     StatusDimensionCreate, StatusDimensionUpdate, StatusDimensionOut,
 )
 from app.models.user import UserOut
-from app.storage.sqlite_client import get_db
+from app.storage.sqlite_client import get_db, read_db
 
 router = APIRouter()
 
@@ -24,6 +24,30 @@ router = APIRouter()
 # Tree Tags (Folder Structure)
 # ===========================
 
+# 候选父标签是否位于 tag_id 的子树中（含自身），用于防止移动后成环
+_SQL_IN_SUBTREE = """
+WITH RECURSIVE sub(id) AS (
+    SELECT ?
+    UNION ALL
+    SELECT c.id FROM tag_tree c JOIN sub ON c.parent_id = sub.id
+)
+SELECT 1 FROM sub WHERE id = ? LIMIT 1
+"""
+
+# 以新路径为根，递归重算全部子孙的 path（根节点自身已单独更新）
+_SQL_REPATH_DESCENDANTS = """
+WITH RECURSIVE sub(id, new_path) AS (
+    SELECT id, ? FROM tag_tree WHERE id = ?
+    UNION ALL
+    SELECT c.id, sub.new_path || '/' || c.name
+    FROM tag_tree c JOIN sub ON c.parent_id = sub.id
+)
+UPDATE tag_tree
+SET path = (SELECT new_path FROM sub WHERE sub.id = tag_tree.id), updated_at = datetime('now')
+WHERE id IN (SELECT id FROM sub) AND path != (SELECT new_path FROM sub WHERE sub.id = tag_tree.id)
+"""
+
+
 async def _build_path(db, name: str, parent_id: str | None) -> str:
     if parent_id is None:
         return name
@@ -34,33 +58,33 @@ async def _build_path(db, name: str, parent_id: str | None) -> str:
     return f"{parent['path']}/{name}"
 
 
-async def _build_tree(rows: list[dict]) -> list[TagTreeOut]:
-    """Build a nested tree from flat rows."""
-    by_id: dict[str, TagTreeOut] = {}
-    roots: list[TagTreeOut] = []
+_TREE_COLUMNS = ("id", "name", "parent_id", "path", "icon", "sort_order", "created_at", "updated_at")
 
+
+def _build_tree(rows) -> list[dict]:
+    """Build a nested tree of plain dicts from flat rows (no per-node model validation)."""
+    by_id: dict[str, dict] = {}
     for r in rows:
-        node = TagTreeOut(**r, children=[])
-        by_id[node.id] = node
+        node = dict(zip(_TREE_COLUMNS, r))
+        node["children"] = []
+        by_id[node["id"]] = node
 
+    roots: list[dict] = []
     for node in by_id.values():
-        if node.parent_id and node.parent_id in by_id:
-            by_id[node.parent_id].children.append(node)
-        else:
-            roots.append(node)
-
+        parent = by_id.get(node["parent_id"]) if node["parent_id"] else None
+        (parent["children"] if parent is not None else roots).append(node)
     return roots
 
 
 @router.get("/tree", response_model=list[TagTreeOut])
 async def list_tree_tags(_: Annotated[UserOut, Depends(get_current_user)]):
-    db = await get_db()
-    cursor = await db.execute(
-        "SELECT id, name, parent_id, path, icon, sort_order, created_at, updated_at "
-        "FROM tag_tree ORDER BY sort_order, name"
-    )
-    rows = [dict(r) for r in await cursor.fetchall()]
-    return await _build_tree(rows)
+    async with read_db() as db:
+        cursor = await db.execute(
+            f"SELECT {', '.join(_TREE_COLUMNS)} FROM tag_tree ORDER BY sort_order, name"
+        )
+        rows = await cursor.fetchall()
+    # 直接序列化为 JSON 字节，跳过 response_model 的逐节点校验
+    return Response(content=orjson.dumps(_build_tree(rows)), media_type="application/json")
 
 
 @router.post("/tree", response_model=TagTreeOut, status_code=201)
@@ -72,14 +96,12 @@ async def create_tree_tag(
     tag_id = str(uuid.uuid4())
     path = await _build_path(db, req.name, req.parent_id)
 
-    await db.execute(
-        "INSERT INTO tag_tree (id, name, parent_id, path, icon, sort_order) VALUES (?, ?, ?, ?, ?, ?)",
+    cursor = await db.execute(
+        "INSERT INTO tag_tree (id, name, parent_id, path, icon, sort_order) VALUES (?, ?, ?, ?, ?, ?) RETURNING *",
         (tag_id, req.name, req.parent_id, path, req.icon, req.sort_order),
     )
-    await db.commit()
-
-    cursor = await db.execute("SELECT * FROM tag_tree WHERE id = ?", (tag_id,))
     row = dict(await cursor.fetchone())
+    await db.commit()
     return TagTreeOut(**row, children=[])
 
 
@@ -97,29 +119,28 @@ async def update_tree_tag(
 
     name = req.name or existing["name"]
     parent_id = req.parent_id if req.parent_id is not None else existing["parent_id"]
+    if parent_id is not None and parent_id != existing["parent_id"]:
+        cursor = await db.execute(_SQL_IN_SUBTREE, (tag_id, parent_id))
+        if await cursor.fetchone() is not None:
+            raise HTTPException(status_code=400, detail="不能移动到自身或子标签下")
     path = await _build_path(db, name, parent_id)
 
-    updates = {"name": name, "parent_id": parent_id, "path": path, "updated_at": "datetime('now')"}
+    updates = {"name": name, "parent_id": parent_id, "path": path}
     if req.icon is not None:
         updates["icon"] = req.icon
     if req.sort_order is not None:
         updates["sort_order"] = req.sort_order
 
-    set_parts = []
-    values = []
-    for k, v in updates.items():
-        if v == "datetime('now')":
-            set_parts.append(f"{k} = datetime('now')")
-        else:
-            set_parts.append(f"{k} = ?")
-            values.append(v)
-
-    values.append(tag_id)
-    await db.execute(f"UPDATE tag_tree SET {', '.join(set_parts)} WHERE id = ?", values)
-    await db.commit()
-
-    cursor = await db.execute("SELECT * FROM tag_tree WHERE id = ?", (tag_id,))
+    set_clause = ", ".join(f"{k} = ?" for k in updates)
+    values = list(updates.values()) + [tag_id]
+    cursor = await db.execute(
+        f"UPDATE tag_tree SET {set_clause}, updated_at = datetime('now') WHERE id = ? RETURNING *", values
+    )
     row = dict(await cursor.fetchone())
+    if path != existing["path"]:
+        # 改名或移动后，所有子孙标签的路径前缀一并更新
+        await db.execute(_SQL_REPATH_DESCENDANTS, (path, tag_id))
+    await db.commit()
     return TagTreeOut(**row, children=[])
 
 
@@ -144,7 +165,8 @@ async def list_content_tags(_: Annotated[UserOut, Depends(get_current_user)]):
     cursor = await db.execute(
         "SELECT id, name, color, usage_count, created_at FROM content_tags ORDER BY usage_count DESC, name"
     )
-    return [ContentTagOut(**dict(r)) for r in await cursor.fetchall()]
+    # 数据库行可信，跳过逐行校验
+    return [ContentTagOut.model_construct(**dict(r)) for r in await cursor.fetchall()]
 
 
 @router.post("/content", response_model=ContentTagOut, status_code=201)
@@ -156,16 +178,15 @@ async def create_content_tag(
     tag_id = str(uuid.uuid4())
 
     try:
-        await db.execute(
-            "INSERT INTO content_tags (id, name, color) VALUES (?, ?, ?)",
+        cursor = await db.execute(
+            "INSERT INTO content_tags (id, name, color) VALUES (?, ?, ?) RETURNING *",
             (tag_id, req.name, req.color),
         )
+        row = await cursor.fetchone()
         await db.commit()
     except Exception:
         raise HTTPException(status_code=400, detail="标签名已存在")
-
-    cursor = await db.execute("SELECT * FROM content_tags WHERE id = ?", (tag_id,))
-    return ContentTagOut(**dict(await cursor.fetchone()))
+    return ContentTagOut(**dict(row))
 
 
 @router.put("/content/{tag_id}", response_model=ContentTagOut)
@@ -184,11 +205,12 @@ async def update_content_tag(
     if updates:
         set_clause = ", ".join(f"{k} = ?" for k in updates)
         values = list(updates.values()) + [tag_id]
-        await db.execute(f"UPDATE content_tags SET {set_clause} WHERE id = ?", values)
+        cursor = await db.execute(f"UPDATE content_tags SET {set_clause} WHERE id = ? RETURNING *", values)
+        row = await cursor.fetchone()
         await db.commit()
-
-    cursor = await db.execute("SELECT * FROM content_tags WHERE id = ?", (tag_id,))
-    row = await cursor.fetchone()
+    else:
+        cursor = await db.execute("SELECT * FROM content_tags WHERE id = ?", (tag_id,))
+        row = await cursor.fetchone()
     if row is None:
         raise HTTPException(status_code=404, detail="标签不存在")
     return ContentTagOut(**dict(row))
@@ -216,8 +238,9 @@ async def list_status_dimensions(_: Annotated[UserOut, Depends(get_current_user)
     rows = []
     for r in await cursor.fetchall():
         d = dict(r)
-        d["options"] = json.loads(d["options"]) if isinstance(d["options"], str) else d["options"]
-        rows.append(StatusDimensionOut(**d))
+        # options 总是以 JSON 文本写入
+        d["options"] = orjson.loads(d["options"])
+        rows.append(StatusDimensionOut.model_construct(**d))
     return rows
 
 
@@ -230,17 +253,16 @@ async def create_status_dimension(
     dim_id = str(uuid.uuid4())
 
     try:
-        await db.execute(
-            "INSERT INTO status_dimensions (id, key, display_name, options, default_value) VALUES (?, ?, ?, ?, ?)",
-            (dim_id, req.key, req.display_name, json.dumps(req.options, ensure_ascii=False), req.default_value),
+        cursor = await db.execute(
+            "INSERT INTO status_dimensions (id, key, display_name, options, default_value) "
+            "VALUES (?, ?, ?, ?, ?) RETURNING *",
+            (dim_id, req.key, req.display_name, orjson.dumps(req.options).decode(), req.default_value),
         )
+        d = dict(await cursor.fetchone())
         await db.commit()
     except Exception:
         raise HTTPException(status_code=400, detail="维度key已存在")
-
-    cursor = await db.execute("SELECT * FROM status_dimensions WHERE id = ?", (dim_id,))
-    d = dict(await cursor.fetchone())
-    d["options"] = json.loads(d["options"])
+    d["options"] = orjson.loads(d["options"])
     return StatusDimensionOut(**d)
 
 
@@ -255,22 +277,23 @@ async def update_status_dimension(
     if req.display_name is not None:
         updates["display_name"] = req.display_name
     if req.options is not None:
-        updates["options"] = json.dumps(req.options, ensure_ascii=False)
+        updates["options"] = orjson.dumps(req.options).decode()
     if req.default_value is not None:
         updates["default_value"] = req.default_value
 
     if updates:
         set_clause = ", ".join(f"{k} = ?" for k in updates)
         values = list(updates.values()) + [dim_id]
-        await db.execute(f"UPDATE status_dimensions SET {set_clause} WHERE id = ?", values)
+        cursor = await db.execute(f"UPDATE status_dimensions SET {set_clause} WHERE id = ? RETURNING *", values)
+        row = await cursor.fetchone()
         await db.commit()
-
-    cursor = await db.execute("SELECT * FROM status_dimensions WHERE id = ?", (dim_id,))
-    row = await cursor.fetchone()
+    else:
+        cursor = await db.execute("SELECT * FROM status_dimensions WHERE id = ?", (dim_id,))
+        row = await cursor.fetchone()
     if row is None:
         raise HTTPException(status_code=404, detail="维度不存在")
     d = dict(row)
-    d["options"] = json.loads(d["options"])
+    d["options"] = orjson.loads(d["options"])
     return StatusDimensionOut(**d)
 
 
@@ -2,16 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import uuid
-import shutil
 from pathlib import Path
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 
 from app.auth.dependencies import get_current_user
-from app.config import get_settings
 from app.models.user import UserOut
+from app.services.file_processor import get_upload_dir, save_upload
 
 router = APIRouter()
 
@@ -23,6 +23,7 @@ ALLOWED_EXTENSIONS = {
     "video": {".mp4", ".mov", ".avi", ".mkv", ".webm"},
     "pdf": {".pdf"},
 }
+_ALL_EXTS = frozenset().union(*ALLOWED_EXTENSIONS.values())
 
 
 @router.post("")
@@ -36,22 +37,17 @@ async def upload_file(
         raise HTTPException(status_code=400, detail="文件名为空")
 
     ext = Path(file.filename).suffix.lower()
-    all_exts = set()
-    for exts in ALLOWED_EXTENSIONS.values():
-        all_exts |= exts
-    if ext not in all_exts:
+    if ext not in _ALL_EXTS:
         raise HTTPException(status_code=400, detail=f"不支持的文件格式: {ext}")
 
-    settings = get_settings()
-    upload_dir = settings.resolved_data_dir / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    upload_dir = get_upload_dir()
 
     file_id = str(uuid.uuid4())
     saved_name = f"{file_id}{ext}"
     saved_path = upload_dir / saved_name
 
-    with open(saved_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # 分块拷贝，在线程中执行，不阻塞事件循环
+    file_sha = await asyncio.to_thread(save_upload, file.file, saved_path)
 
     entity_title = title or Path(file.filename).stem
 
@@ -61,6 +57,7 @@ async def upload_file(
         original_filename=file.filename,
         content_type=file.content_type or "application/octet-stream",
         created_by=user.id,
+        file_sha=file_sha,
     )
 
     return {
@@ -68,5 +65,6 @@ async def upload_file(
         "entity_id": result.get("id"),
         "status": result.get("status"),
         "title": entity_title,
-        "file": saved_name,
+        # 重复文件不落盘，沿用已有实体
+        "file": saved_name if result.get("status") != "skipped" else None,
     }
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from functools import lru_cache
 from pathlib import Path
 
 import httpx
@@ -17,10 +20,35 @@ _GITHUB_RAW_URL = (
 )
 
 
+_REMOTE_TTL = 300.0  # GitHub 远程版本缓存 5 分钟
+_remote_cache: dict = {"ts": 0.0, "remote": ""}
+_remote_lock = asyncio.Lock()
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=8.0)
+    return _http_client
+
+
+async def close_client():
+    global _http_client
+    if _http_client and not _http_client.is_closed:
+        await _http_client.aclose()
+        _http_client = None
+
+
+@lru_cache(maxsize=1)
+def _read_version_file(mtime_ns: int) -> str:
+    return _VERSION_FILE.read_text(encoding="utf-8").strip()
+
+
 def get_local_version() -> str:
-    """读取项目根目录 VERSION 文件，返回版本字符串。"""
+    """读取项目根目录 VERSION 文件，返回版本字符串（按 mtime 缓存）。"""
     try:
-        return _VERSION_FILE.read_text(encoding="utf-8").strip()
+        return _read_version_file(_VERSION_FILE.stat().st_mtime_ns)
     except Exception:
         return "unknown"
 
@@ -47,17 +75,23 @@ async def check_update():
     has_update = False
     error: str | None = None
 
-    try:
-        async with httpx.AsyncClient(timeout=8.0) as client:
-            resp = await client.get(_GITHUB_RAW_URL)
-            if resp.status_code == 200:
-                remote = resp.text.strip()
-                has_update = _parse_semver(remote) > _parse_semver(local)
-            else:
-                error = f"GitHub 返回 {resp.status_code}"
-    except Exception as e:
-        logger.warning("检查远程版本失败: %s", e)
-        error = str(e)
+    async with _remote_lock:
+        if _remote_cache["remote"] and time.monotonic() - _remote_cache["ts"] < _REMOTE_TTL:
+            remote = _remote_cache["remote"]
+        else:
+            try:
+                resp = await _get_client().get(_GITHUB_RAW_URL)
+                if resp.status_code == 200:
+                    remote = resp.text.strip()
+                    _remote_cache.update(ts=time.monotonic(), remote=remote)
+                else:
+                    error = f"GitHub 返回 {resp.status_code}"
+            except Exception as e:
+                logger.warning("检查远程版本失败: %s", e)
+                error = str(e)
+
+    if error is None:
+        has_update = _parse_semver(remote) > _parse_semver(local)
 
     return {
         "local": local,
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.config import get_settings
@@ -26,7 +26,57 @@ _SINGLE_MODE_ADMIN = UserOut(
 )
 
 
+# 用户与其角色权限一次查出，require_permission 无需再查库
+_SQL_USER_WITH_PERMISSIONS = (
+    "SELECT u.id, u.username, u.display_name, u.role, u.is_active, u.created_at, u.last_login_at, "
+    "GROUP_CONCAT(rp.permission) AS perms "
+    "FROM users u LEFT JOIN role_permissions rp ON rp.role = u.role "
+    "WHERE u.id = ? GROUP BY u.id"
+)
+
+
+@lru_cache(maxsize=256)
+def _parse_permissions(perms: str | None) -> frozenset[str]:
+    # 同一角色的权限串得到同一个 frozenset 对象，其 hash 只算一次，供 _has_permission 缓存命中
+    return frozenset(perms.split(",")) if perms else frozenset()
+
+
+# 前缀树中的标记键：用独立对象而非字符串，避免与字面量段名（如 "*"）冲突
+_ANY = object()
+_END = object()
+
+
+@lru_cache(maxsize=256)
+def _permission_trie(granted: frozenset[str]) -> dict:
+    """按 ":" 分段把权限集编译成前缀树：子节点以段名为键，_ANY 标记该层通配，_END 标记精确授权到此为止。"""
+    trie: dict = {}
+    for perm in granted:
+        node = trie
+        *parents, last = perm.split(":")
+        for seg in parents:
+            node = node.setdefault(seg, {})
+        if last == "*":
+            node[_ANY] = True
+        else:
+            node.setdefault(last, {})[_END] = True
+    return trie
+
+
+@lru_cache(maxsize=1024)
+def _has_permission(granted: frozenset[str], permission: str) -> bool:
+    """精确匹配、全局 "*"，或任一前缀通配（"a:*"、"a:b:*"、…、"a:b:c:*"）。"""
+    node = _permission_trie(granted)
+    for seg in permission.split(":"):
+        if _ANY in node:
+            return True
+        node = node.get(seg)
+        if node is None:
+            return False
+    return _ANY in node or _END in node
+
+
 async def get_current_user(
+    request: Request,
     credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(_bearer_scheme)] = None,
 ) -> UserOut:
     settings = get_settings()
@@ -34,6 +84,11 @@ async def get_current_user(
     if settings.auth_mode == "single":
         return _SINGLE_MODE_ADMIN
 
+    # 同一请求内已解析过（如 use_cache=False 或闭包依赖再次解析）：直接复用，不再解码 token、不再查库
+    cached = getattr(request.state, "user", None)
+    if cached is not None:
+        return cached
+
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="未提供认证凭据")
 
@@ -43,17 +98,27 @@ async def get_current_user(
 
     user_id = payload.get("sub")
     db = await get_db()
-    cursor = await db.execute(
-        "SELECT id, username, display_name, role, is_active, created_at, last_login_at "
-        "FROM users WHERE id = ?",
-        (user_id,),
-    )
+    cursor = await db.execute(_SQL_USER_WITH_PERMISSIONS, (user_id,))
     row = await cursor.fetchone()
 
     if row is None or not row["is_active"]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户不存在或已禁用")
 
-    return UserOut(**dict(row))
+    d = dict(row)
+    perms = d.pop("perms")
+    user = UserOut(**d)
+    user._permissions = _parse_permissions(perms)
+    request.state.user = user
+    request.state.token_payload = payload
+    return user
+
+
+async def single_mode_user() -> UserOut:
+    """单用户模式下替代整条认证依赖链：无子依赖，不解析 Authorization 头。
+
+    必须是 async：同步依赖会被 FastAPI 放进线程池执行，反而更慢。
+    """
+    return _SINGLE_MODE_ADMIN
 
 
 async def get_admin_user(user: Annotated[UserOut, Depends(get_current_user)]) -> UserOut:
@@ -63,27 +128,17 @@ async def get_admin_user(user: Annotated[UserOut, Depends(get_current_user)]) ->
 
 
 def require_permission(permission: str):
+    # auth_mode 只来自 .env，运行期不变：单用户模式在定义路由时就特化掉权限检查
+    if get_settings().auth_mode == "single":
+        return Depends(single_mode_user)
+
     async def _check(user: Annotated[UserOut, Depends(get_current_user)]) -> UserOut:
         if user.role == "admin":
             return user
 
-        db = await get_db()
-        cursor = await db.execute(
-            "SELECT permission FROM role_permissions WHERE role = ?",
-            (user.role,),
-        )
-        rows = await cursor.fetchall()
-        user_permissions = {r["permission"] for r in rows}
-
-        if "*" in user_permissions or permission in user_permissions:
+        if _has_permission(user._permissions, permission):
             return user
 
-        parts = permission.split(":")
-        for i in range(len(parts)):
-            wildcard = ":".join(parts[: i + 1]) + ":*"
-            if wildcard in user_permissions:
-                return user
-
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"缺少权限: {permission}")
 
     return Depends(_check)
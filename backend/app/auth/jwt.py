@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 
 from jose import jwt, JWTError
 
 from app.config import get_settings
 
+# 已验证 token 的短期缓存：同一 token 在 TTL 内不再重复做 HMAC 校验与解析
+_DECODE_CACHE_TTL = 60.0
+_DECODE_CACHE_MAX = 10_000
+# key: blake2b(token)（不在内存里保留原始 token），value: (缓存过期时刻 monotonic, exp unix 秒, payload)
+_decode_cache: OrderedDict[bytes, tuple[float, float, dict]] = OrderedDict()
+
 
 def create_access_token(user_id: str, role: str) -> str:
     settings = get_settings()
@@ -17,9 +26,24 @@ def create_access_token(user_id: str, role: str) -> str:
 
 
 def decode_access_token(token: str) -> dict | None:
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    entry = _decode_cache.get(key)
+    if entry is not None:
+        cached_until, exp, payload = entry
+        if time.monotonic() < cached_until and time.time() < exp:
+            _decode_cache.move_to_end(key)
+            return payload
+        del _decode_cache[key]
+
     settings = get_settings()
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        return payload
     except JWTError:
         return None
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _decode_cache[key] = (time.monotonic() + _DECODE_CACHE_TTL, float(exp), payload)
+        while len(_decode_cache) > _DECODE_CACHE_MAX:
+            _decode_cache.popitem(last=False)
+    return payload
@@ -0,0 +1,33 @@
+"""Password hashing via the native bcrypt binding.
+
+bcrypt is CPU-bound (tens of ms per call) and releases the GIL, so the
+work runs in a worker thread to keep the event loop responsive.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import bcrypt
+
+from app.config import get_settings
+
+
+def _hash_sync(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=get_settings().bcrypt_rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("ascii")
+
+
+def _verify_sync(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("ascii"))
+    except ValueError:
+        return False
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.to_thread(_hash_sync, password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await asyncio.to_thread(_verify_sync, password, password_hash)
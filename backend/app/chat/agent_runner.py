@@ -1,26 +1,90 @@
 """Agent runner: LLM agent that iteratively calls tools to answer complex queries.
 
 Supports OpenAI function-calling format. The agent loop:
-1. Send message + tool definitions to LLM
+1. Send message + tool definitions to LLM (streamed)
 2. If LLM returns tool calls → execute them, append results
 3. Repeat until LLM returns a final text answer or max iterations reached
+
+Text deltas are yielded as soon as they arrive; read-only tool calls start executing
+while the rest of the response is still streaming.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from functools import lru_cache
 from typing import Any
 
-import httpx
+import orjson
 
 from app.config import get_settings, get_user_config
-from app.chat.agent_tools import TOOL_SCHEMAS, execute_tool
+from app.chat.agent_tools import TOOL_SCHEMAS_JSON, WRITE_TOOLS, execute_tool
 from app.services.llm_service import _get_client, _auth_headers
 
 logger = logging.getLogger(__name__)
 
 MAX_ITERATIONS = 8
+# 每轮请求都会重发完整对话：按字符预算约束提示长度（中文约 1 字/token，约合 12k token）
+PROMPT_CHAR_BUDGET = 12000
+TOOL_SUMMARY_CHARS = 500
+
+# 单次批量调用 run_agents 时同时进行的 agent 数上限
+AGENT_BATCH_CONCURRENCY = 4
+
+
+def _parse_args(tc: dict[str, Any]) -> dict[str, Any]:
+    try:
+        return orjson.loads(tc["function"]["arguments"])
+    except orjson.JSONDecodeError:
+        return {}
+
+
+def _message_chars(msg: dict[str, Any]) -> int:
+    n = len(msg.get("content") or "")
+    for tc in msg.get("tool_calls") or ():
+        n += len(tc["function"]["arguments"])
+    return n
+
+
+def _summarize_tool_results(messages: list[dict[str, Any]], start: int) -> None:
+    """Replace full tool outputs from messages[start:] with a truncated summary."""
+    for msg in messages[start:]:
+        content = msg.get("content") or ""
+        if msg["role"] == "tool" and len(content) > TOOL_SUMMARY_CHARS:
+            msg["content"] = orjson.dumps({"summary": content[:TOOL_SUMMARY_CHARS]}).decode()
+
+
+def _trim_history(messages: list[dict[str, Any]], n_history: int) -> int:
+    """Drop the oldest history messages until the prompt fits the budget; returns how many were dropped.
+
+    Only plain history turns are dropped: the system prompt, the current query and the
+    assistant/tool pairs of this run stay, since every tool_call needs its tool reply.
+    """
+    total = sum(map(_message_chars, messages))
+    dropped = 0
+    while dropped < n_history and total > PROMPT_CHAR_BUDGET:
+        total -= _message_chars(messages.pop(1))
+        dropped += 1
+    return dropped
+
+
+_PAYLOAD_PARAMS = b',"tool_choice":"auto","temperature":0.3,"max_tokens":4096,"stream":true'
+
+
+@lru_cache(maxsize=8)
+def _payload_prefix(model: str) -> bytes:
+    """Static request head (model, tools, sampling params) with the closing brace stripped.
+
+    Built once per model: every request starts with byte-identical tools, so the
+    inference server's prefix cache can hit; only the messages are spliced in per call.
+    """
+    return b'{"model":' + orjson.dumps(model) + b',"tools":' + TOOL_SCHEMAS_JSON + _PAYLOAD_PARAMS
+
+
+def _build_payload(model: str, messages: list[dict[str, Any]]) -> bytes:
+    return _payload_prefix(model) + b',"messages":' + orjson.dumps(messages) + b"}"
 
 AGENT_SYSTEM_PROMPT = """你是"第二大脑"智能助手（Agent 模式）。你可以管理知识库，并与用户 Mac 上的 Apple 备忘录、提醒事项、日历实时交互。
 
@@ -46,11 +110,66 @@ AGENT_SYSTEM_PROMPT = """你是"第二大脑"智能助手（Agent 模式）。
 3. 用中文回答，简洁清晰"""
 
 
-async def run_agent(
+class _Turn:
+    """Accumulates one streamed assistant turn and dispatches tool calls as they complete."""
+
+    def __init__(self) -> None:
+        self.content: list[str] = []
+        self.calls: list[dict[str, Any]] = []
+        self.tasks: dict[int, asyncio.Task[str]] = {}
+        self._saw_write = False
+
+    def add_tool_delta(self, delta: dict[str, Any]) -> None:
+        idx = delta.get("index", 0)
+        while len(self.calls) <= idx:
+            # 新的工具调用开始：之前的调用参数已完整，可以提前执行
+            self._dispatch(len(self.calls) - 1)
+            self.calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+        tc = self.calls[idx]
+        if delta.get("id"):
+            tc["id"] = delta["id"]
+        fn = delta.get("function") or {}
+        if fn.get("name"):
+            tc["function"]["name"] += fn["name"]
+        if fn.get("arguments"):
+            tc["function"]["arguments"] += fn["arguments"]
+
+    def _dispatch(self, idx: int) -> None:
+        if idx < 0 or idx in self.tasks:
+            return
+        name = self.calls[idx]["function"]["name"]
+        if self._saw_write or name in WRITE_TOOLS:
+            # 写操作及其之后的调用留到流结束后按顺序串行执行
+            self._saw_write = True
+            return
+        self.tasks[idx] = asyncio.create_task(execute_tool(name, _parse_args(self.calls[idx])))
+
+    async def results(self) -> list[str]:
+        self._dispatch(len(self.calls) - 1)
+        out = []
+        for i, tc in enumerate(self.calls):
+            task = self.tasks.get(i)
+            out.append(await task if task else await execute_tool(tc["function"]["name"], _parse_args(tc)))
+        return out
+
+    def cancel(self) -> None:
+        for task in self.tasks.values():
+            task.cancel()
+
+
+async def run_agent_stream(
     query: str,
     history: list[dict[str, str]] | None = None,
-) -> dict[str, Any]:
-    """Run the agent loop. Returns final answer + tool call log."""
+) -> AsyncIterator[dict[str, Any]]:
+    """Run the agent loop, yielding events as they happen.
+
+    Events: {"type": "tool_call", "tool", "arguments"}, {"type": "token", "content"},
+    {"type": "preamble", "content"} and finally {"type": "final", "answer", "tool_calls", "iterations"}.
+    Tokens are streamed before it is known whether the turn calls tools; when it does, a
+    ``preamble`` event carrying that turn's text follows, and clients should drop those tokens
+    from the answer. The final answer is the text of the last turn without tool calls (or the
+    error / iteration-limit notice).
+    """
 
     messages: list[dict[str, Any]] = [
         {"role": "system", "content": AGENT_SYSTEM_PROMPT},
@@ -59,74 +178,120 @@ async def run_agent(
     if history:
         for msg in history[-10:]:
             messages.append({"role": msg["role"], "content": msg["content"]})
+    n_history = len(messages) - 1
 
     messages.append({"role": "user", "content": query})
+    last_tool_start = len(messages)
 
     tool_log: list[dict[str, Any]] = []
-    final_answer = ""
+    answer = ""
 
     settings = get_settings()
     client = await _get_client()
     url = f"{settings.llm_api_url.rstrip('/')}/chat/completions"
+    headers = {**_auth_headers(), "Content-Type": "application/json"}
 
     for iteration in range(MAX_ITERATIONS):
-        payload: dict[str, Any] = {
-            "model": settings.llm_model,
-            "messages": messages,
-            "tools": TOOL_SCHEMAS,
-            "tool_choice": "auto",
-            "temperature": 0.3,
-            "max_tokens": 4096,
-        }
-
+        dropped = _trim_history(messages, n_history)
+        n_history -= dropped
+        last_tool_start -= dropped
+        turn = _Turn()
+        # 客户端断开（GeneratorExit / CancelledError）时也要取消已启动的工具任务
         try:
-            resp = await client.post(url, json=payload, headers=_auth_headers(), timeout=60.0)
-            resp.raise_for_status()
-            data = resp.json()
-        except Exception as e:
-            logger.error("Agent LLM call failed at iteration %d: %s", iteration, e)
-            final_answer = f"Agent 调用 LLM 失败: {e}"
-            break
-
-        choice = data["choices"][0]
-        msg = choice["message"]
-        finish_reason = choice.get("finish_reason", "")
-
-        if msg.get("tool_calls"):
-            messages.append(msg)
-
-            for tc in msg["tool_calls"]:
-                fn_name = tc["function"]["name"]
-                try:
-                    fn_args = json.loads(tc["function"]["arguments"])
-                except json.JSONDecodeError:
-                    fn_args = {}
-
-                logger.info("Agent tool call [%d]: %s(%s)", iteration, fn_name, fn_args)
-                result_str = await execute_tool(fn_name, fn_args)
+            try:
+                async with client.stream(
+                    "POST", url, content=_build_payload(settings.llm_model, messages), headers=headers, timeout=60.0,
+                ) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            choices = orjson.loads(data).get("choices") or []
+                        except orjson.JSONDecodeError:
+                            continue
+                        if not choices:
+                            continue
+                        delta = choices[0].get("delta") or {}
+                        for tc_delta in delta.get("tool_calls") or ():
+                            turn.add_tool_delta(tc_delta)
+                        content = delta.get("content")
+                        if content:
+                            turn.content.append(content)
+                            yield {"type": "token", "content": content}
+            except Exception as e:
+                logger.error("Agent LLM call failed at iteration %d: %s", iteration, e)
+                answer = f"Agent 调用 LLM 失败: {e}"
+                yield {"type": "token", "content": answer}
+                break
 
+            if not turn.calls:
+                answer = "".join(turn.content)
+                break
+
+            if turn.content:
+                # 已流出的 token 只是工具调用前的铺垫，通知客户端从答案中移除
+                yield {"type": "preamble", "content": "".join(turn.content)}
+
+            # 只保留最近一轮的完整工具输出，更早的压缩为摘要
+            _summarize_tool_results(messages, last_tool_start)
+            messages.append({"role": "assistant", "content": "".join(turn.content) or None, "tool_calls": turn.calls})
+            for tc in turn.calls:
+                fn_args = _parse_args(tc)
+                logger.info("Agent tool call [%d]: %s(%s)", iteration, tc["function"]["name"], fn_args)
+                yield {"type": "tool_call", "tool": tc["function"]["name"], "arguments": fn_args}
+
+            last_tool_start = len(messages)
+            for tc, result_str in zip(turn.calls, await turn.results()):
                 tool_log.append({
                     "iteration": iteration,
-                    "tool": fn_name,
-                    "arguments": fn_args,
+                    "tool": tc["function"]["name"],
+                    "arguments": _parse_args(tc),
                     "result_preview": result_str[:500],
                 })
-
                 messages.append({
                     "role": "tool",
                     "tool_call_id": tc["id"],
                     "content": result_str,
                 })
-
-            continue
-
-        final_answer = msg.get("content", "")
-        break
+        finally:
+            turn.cancel()
     else:
-        final_answer = final_answer or "Agent 达到最大迭代次数，请尝试简化问题。"
+        answer = "Agent 达到最大迭代次数，请尝试简化问题。"
+        yield {"type": "token", "content": answer}
 
-    return {
-        "answer": final_answer,
+    yield {
+        "type": "final",
+        "answer": answer,
         "tool_calls": tool_log,
         "iterations": len(tool_log),
     }
+
+
+async def run_agent(
+    query: str,
+    history: list[dict[str, str]] | None = None,
+) -> dict[str, Any]:
+    """Run the agent loop. Returns final answer + tool call log."""
+    result: dict[str, Any] = {}
+    async for event in run_agent_stream(query, history):
+        if event["type"] == "final":
+            result = event
+    return {k: result[k] for k in ("answer", "tool_calls", "iterations")}
+
+
+async def run_agents(queries: list[str]) -> list[dict[str, Any]]:
+    """Run independent agent queries concurrently; results keep the order of ``queries``.
+
+    Concurrency is capped by AGENT_BATCH_CONCURRENCY; all runs share the pooled LLM client.
+    """
+    sem = asyncio.Semaphore(AGENT_BATCH_CONCURRENCY)
+
+    async def _one(query: str) -> dict[str, Any]:
+        async with sem:
+            return await run_agent(query)
+
+    return await asyncio.gather(*(_one(q) for q in queries))
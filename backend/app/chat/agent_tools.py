@@ -6,12 +6,17 @@ Tools enable the LLM to perform actions beyond simple RAG retrieval.
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
+import sqlite3
+from datetime import datetime, timezone, tzinfo
 from typing import Any
 
-from app.storage.sqlite_client import get_db
-from app.services.embedding_service import semantic_search
+import orjson
+
+from app.storage.sqlite_client import read_db, run_sync
+from app.services.embedding_service import cached_semantic_search
+from app.services.keyword_search import keyword_search
 from app.storage.neo4j_client import is_available as neo4j_ok, run_cypher, get_entity_relations
 from app.sync.messages import APPLE_JXA_USER_MESSAGE
 
@@ -254,19 +259,30 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
         },
     },
 ]
+# 工具定义是静态的：导入时序列化一次，请求体直接拼接这段字节
+TOOL_SCHEMAS_JSON: bytes = orjson.dumps(TOOL_SCHEMAS)
+
+# 有副作用的工具：同一轮出现时整轮按模型给出的顺序串行执行
+WRITE_TOOLS = frozenset({
+    "create_entity", "update_entity_tags",
+    "create_apple_note", "create_apple_reminder", "create_apple_event",
+})
+
+
+def _dumps(obj: Any) -> str:
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
 async def execute_tool(name: str, arguments: dict[str, Any]) -> str:
     """Execute a tool by name and return the result as a string."""
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        return _dumps({"error": f"未知工具: {name}"})
     try:
-        handler = _HANDLERS.get(name)
-        if not handler:
-            return json.dumps({"error": f"未知工具: {name}"}, ensure_ascii=False)
-        result = await handler(arguments)
-        return json.dumps(result, ensure_ascii=False, default=str)
+        return _dumps(await handler(arguments))
     except Exception as e:
         logger.error("Tool execution error: %s(%s) -> %s", name, arguments, e)
-        return json.dumps({"error": str(e)}, ensure_ascii=False)
+        return _dumps({"error": str(e)})
 
 
 # ─── Tool Implementations ───
@@ -278,51 +294,45 @@ async def _search_knowledge(args: dict) -> Any:
     folder_tag = args.get("folder_tag")
     content_tag = args.get("content_tag")
 
-    results = []
-    try:
-        vector_hits = await semantic_search(
-            query, top_k=top_k,
-            folder_filter=folder_tag,
-            tag_filter=content_tag,
-        )
-        results.extend(vector_hits)
-    except Exception:
-        pass
-
-    db = await get_db()
-    cursor = await db.execute(
-        """SELECT id, title, substr(content, 1, 300) as content, source
-           FROM entities WHERE title LIKE ? OR content LIKE ?
-           ORDER BY updated_at DESC LIMIT ?""",
-        (f"%{query}%", f"%{query}%", top_k),
+    # 向量检索与关键词（FTS5）检索并发执行；向量结果优先，关键词结果按 id 去重补充
+    vector_hits, meta_hits = await asyncio.gather(
+        cached_semantic_search(query, top_k=top_k, folder_filter=folder_tag, tag_filter=content_tag),
+        keyword_search(query, top_k=top_k),
+        return_exceptions=True,
     )
-    meta_hits = [dict(r) for r in await cursor.fetchall()]
-    seen = {r["entity_id"] for r in results}
+    if isinstance(meta_hits, BaseException):
+        raise meta_hits
+
+    merged: dict[str, dict] = {}
+    if not isinstance(vector_hits, BaseException):
+        for h in vector_hits:
+            merged.setdefault(h["entity_id"], h)
     for h in meta_hits:
-        if h["id"] not in seen:
-            results.append({"entity_id": h["id"], "title": h["title"], "content": h["content"], "source": h["source"]})
+        merged.setdefault(h["id"], {
+            "entity_id": h["id"], "title": h["title"], "content": h["content"], "source": h["source"],
+        })
 
-    return {"query": query, "count": len(results), "results": results[:top_k]}
+    results = list(merged.values())[:top_k]
+    return {"query": query, "count": len(results), "results": results}
 
 
 async def _get_entity_detail(args: dict) -> Any:
-    db = await get_db()
-    cursor = await db.execute("SELECT * FROM entities WHERE id = ?", (args["entity_id"],))
-    row = await cursor.fetchone()
-    if not row:
-        return {"error": "实体不存在"}
-    entity = dict(row)
-
-    cursor = await db.execute(
-        "SELECT tag_id FROM entity_tags WHERE entity_id = ?", (args["entity_id"],)
-    )
-    tags = [r["tag_id"] for r in await cursor.fetchall()]
-    entity["tags"] = tags
+    async with read_db() as db:
+        cursor = await db.execute("SELECT * FROM entities WHERE id = ?", (args["entity_id"],))
+        row = await cursor.fetchone()
+        if not row:
+            return {"error": "实体不存在"}
+        entity = dict(row)
+
+        cursor = await db.execute(
+            "SELECT tt.path FROM entity_tags et JOIN tag_tree tt ON tt.id = et.tag_tree_id WHERE et.entity_id = ?",
+            (args["entity_id"],),
+        )
+        entity["tags"] = [r["path"] for r in await cursor.fetchall()]
     return entity
 
 
 async def _list_entities(args: dict) -> Any:
-    db = await get_db()
     conditions = []
     params: list = []
 
@@ -337,11 +347,22 @@ async def _list_entities(args: dict) -> Any:
     limit = args.get("limit", 10)
     params.append(limit)
 
-    cursor = await db.execute(
-        f"SELECT id, title, source, review_status, created_at FROM entities {where} ORDER BY updated_at DESC LIMIT ?",
-        params,
-    )
-    return {"entities": [dict(r) for r in await cursor.fetchall()]}
+    async with read_db() as db:
+        cursor = await db.execute(
+            f"SELECT id, title, source, review_status, created_at FROM entities {where} "
+            "ORDER BY updated_at DESC LIMIT ?",
+            params,
+        )
+        return {"entities": [dict(r) for r in await cursor.fetchall()]}
+
+
+# 关系类型作为参数传入（不拼进 Cypher 文本）：杜绝注入，且所有调用共用同一条已编译的执行计划
+_CYPHER_QUERY_GRAPH = """
+    MATCH (e:Entity)-[r]-(related:Entity)
+    WHERE e.title CONTAINS $title AND ($rel = '' OR type(r) = $rel)
+    RETURN e.title as entity, type(r) as relation, related.title as related_entity
+    LIMIT 20
+"""
 
 
 async def _query_graph(args: dict) -> Any:
@@ -349,108 +370,121 @@ async def _query_graph(args: dict) -> Any:
         return {"error": "知识图谱不可用"}
 
     title = args["entity_title"]
-    rel_filter = args.get("relation_type", "")
-
-    rel_clause = f"AND type(r) = '{rel_filter}'" if rel_filter else ""
-    cypher = f"""
-        MATCH (e:Entity)-[r]-(related:Entity)
-        WHERE e.title CONTAINS $title {rel_clause}
-        RETURN e.title as entity, type(r) as relation, related.title as related_entity
-        LIMIT 20
-    """
-    results = await run_cypher(cypher, {"title": title})
+    rel_filter = args.get("relation_type") or ""
+
+    results = await run_cypher(_CYPHER_QUERY_GRAPH, {"title": title, "rel": rel_filter})
     return {"entity": title, "relations": results or []}
 
 
 async def _list_tags(args: dict) -> Any:
-    db = await get_db()
     tag_type = args.get("tag_type", "all")
     result: dict[str, Any] = {}
 
-    if tag_type in ("folder", "all"):
-        cursor = await db.execute("SELECT id, name, parent_id, path FROM tag_tree ORDER BY sort_order")
-        result["folder_tags"] = [dict(r) for r in await cursor.fetchall()]
-
-    if tag_type in ("content", "all"):
-        cursor = await db.execute("SELECT id, name, color, usage_count FROM content_tags ORDER BY usage_count DESC")
-        result["content_tags"] = [dict(r) for r in await cursor.fetchall()]
-
-    if tag_type in ("status", "all"):
-        cursor = await db.execute("SELECT id, key, display_name, options, default_value FROM status_dimensions")
-        rows = await cursor.fetchall()
-        result["status_dimensions"] = []
-        for r in rows:
-            d = dict(r)
-            try:
-                d["options"] = json.loads(d["options"]) if isinstance(d["options"], str) else d["options"]
-            except Exception:
-                pass
-            result["status_dimensions"].append(d)
+    async with read_db() as db:
+        if tag_type in ("folder", "all"):
+            cursor = await db.execute("SELECT id, name, parent_id, path FROM tag_tree ORDER BY sort_order")
+            result["folder_tags"] = [dict(r) for r in await cursor.fetchall()]
+
+        if tag_type in ("content", "all"):
+            cursor = await db.execute("SELECT id, name, color, usage_count FROM content_tags ORDER BY usage_count DESC")
+            result["content_tags"] = [dict(r) for r in await cursor.fetchall()]
+
+        if tag_type in ("status", "all"):
+            cursor = await db.execute("SELECT id, key, display_name, options, default_value FROM status_dimensions")
+            rows = await cursor.fetchall()
+            result["status_dimensions"] = []
+            for r in rows:
+                d = dict(r)
+                try:
+                    d["options"] = orjson.loads(d["options"]) if isinstance(d["options"], str) else d["options"]
+                except Exception:
+                    pass
+                result["status_dimensions"].append(d)
 
     return result
 
 
 async def _create_entity(args: dict) -> Any:
     import uuid
-    from datetime import datetime
 
-    db = await get_db()
     entity_id = str(uuid.uuid4())
-    now = datetime.now().isoformat()
+    source = args.get("source", "agent")
+    title, content = args["title"], args["content"]
+
+    # 实体与初始版本在写线程内同一事务写入；时间戳用库内 datetime('now')，与其他写入路径格式一致
+    def _insert(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """INSERT INTO entities (id, source, title, content, content_type, current_version,
+               review_status, created_by)
+               VALUES (?, ?, ?, ?, 'text/markdown', 1, 'pending', 'agent')""",
+            (entity_id, source, title, content),
+        )
+        conn.execute(
+            "INSERT INTO entity_versions (id, entity_id, version_number, title, content, change_source) "
+            "VALUES (?, ?, 1, ?, ?, 'agent')",
+            (str(uuid.uuid4()), entity_id, title, content),
+        )
+
+    await run_sync(_insert)
+    return {"entity_id": entity_id, "title": title, "status": "created"}
 
-    await db.execute(
-        """INSERT INTO entities (id, source, title, content, content_type, current_version,
-           review_status, created_at, updated_at, created_by)
-           VALUES (?, ?, ?, ?, 'text/markdown', 1, 'pending', ?, ?, 'agent')""",
-        (entity_id, args.get("source", "agent"), args["title"], args["content"], now, now),
-    )
-    await db.execute(
-        "INSERT INTO entity_versions (id, entity_id, version_number, title, content, change_source, created_at) VALUES (?, ?, 1, ?, ?, 'agent', ?)",
-        (str(uuid.uuid4()), entity_id, args["title"], args["content"], now),
-    )
-    await db.commit()
-    return {"entity_id": entity_id, "title": args["title"], "status": "created"}
+
+def _ids_by_name(conn: sqlite3.Connection, table: str, names: list[str]) -> dict[str, str]:
+    """一次 IN 查询把标签名解析为 id（table 仅限内部常量）。"""
+    if not names:
+        return {}
+    placeholders = ",".join("?" * len(names))
+    rows = conn.execute(f"SELECT id, name FROM {table} WHERE name IN ({placeholders})", names).fetchall()
+    found: dict[str, str] = {}
+    for r in rows:
+        found.setdefault(r["name"], r["id"])
+    return found
 
 
 async def _update_entity_tags(args: dict) -> Any:
-    db = await get_db()
     entity_id = args["entity_id"]
+    folder_names = list(dict.fromkeys(args.get("folder_tags") or []))
+    content_names = list(dict.fromkeys(args.get("content_tags") or []))
+
+    # entity_tags 每个文件夹标签一行，内容标签名以 JSON 数组存于 content_tag_ids（与审核/实体接口一致）
+    def _apply(conn: sqlite3.Connection) -> list[str] | None:
+        if conn.execute("SELECT 1 FROM entities WHERE id = ?", (entity_id,)).fetchone() is None:
+            return None
+        folder_ids = _ids_by_name(conn, "tag_tree", folder_names)
+        known_content = _ids_by_name(conn, "content_tags", content_names)
+        new_content = [n for n in content_names if n in known_content]
+
+        existing = conn.execute(
+            "SELECT rowid, content_tag_ids FROM entity_tags WHERE entity_id = ?", (entity_id,),
+        ).fetchall()
+        updates = []
+        all_content: dict[str, None] = {}
+        for r in existing:
+            names = orjson.loads(r["content_tag_ids"]) if r["content_tag_ids"] else []
+            merged = list(dict.fromkeys([*names, *new_content]))
+            all_content.update(dict.fromkeys(merged))
+            if merged != names:
+                updates.append((orjson.dumps(merged).decode(), r["rowid"]))
+        all_content.update(dict.fromkeys(new_content))
+        ct_json = orjson.dumps(list(all_content)).decode() if all_content else None
+
+        if updates:
+            conn.executemany("UPDATE entity_tags SET content_tag_ids = ? WHERE rowid = ?", updates)
+        if folder_ids:
+            conn.executemany(
+                "INSERT OR IGNORE INTO entity_tags (entity_id, tag_tree_id, content_tag_ids) VALUES (?, ?, ?)",
+                [(entity_id, tag_id, ct_json) for tag_id in folder_ids.values()],
+            )
+        elif new_content and not existing:
+            conn.execute(
+                "INSERT INTO entity_tags (entity_id, tag_tree_id, content_tag_ids) VALUES (?, NULL, ?)",
+                (entity_id, ct_json),
+            )
+        return [f"folder:{n}" for n in folder_ids] + [f"content:{n}" for n in new_content]
 
-    cursor = await db.execute("SELECT id FROM entities WHERE id = ?", (entity_id,))
-    if not await cursor.fetchone():
+    added = await run_sync(_apply)
+    if added is None:
         return {"error": "实体不存在"}
-
-    added = []
-
-    if args.get("folder_tags"):
-        for tag_name in args["folder_tags"]:
-            cursor = await db.execute("SELECT id FROM tag_tree WHERE name = ?", (tag_name,))
-            row = await cursor.fetchone()
-            if row:
-                try:
-                    await db.execute(
-                        "INSERT OR IGNORE INTO entity_tags (entity_id, tag_id, tag_type) VALUES (?, ?, 'folder')",
-                        (entity_id, row["id"]),
-                    )
-                    added.append(f"folder:{tag_name}")
-                except Exception:
-                    pass
-
-    if args.get("content_tags"):
-        for tag_name in args["content_tags"]:
-            cursor = await db.execute("SELECT id FROM content_tags WHERE name = ?", (tag_name,))
-            row = await cursor.fetchone()
-            if row:
-                try:
-                    await db.execute(
-                        "INSERT OR IGNORE INTO entity_tags (entity_id, tag_id, tag_type) VALUES (?, ?, 'content')",
-                        (entity_id, row["id"]),
-                    )
-                    added.append(f"content:{tag_name}")
-                except Exception:
-                    pass
-
-    await db.commit()
     return {"entity_id": entity_id, "tags_added": added}
 
 
@@ -472,47 +506,63 @@ async def _summarize_content(args: dict) -> Any:
     return {"summary": result}
 
 
+def _load_local_tz() -> tzinfo:
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo("Asia/Shanghai")
+    except Exception:
+        # 缺少 tzdata 时退回 UTC，与原先的降级行为一致
+        return timezone.utc
+
+
+# 时区只解析一次；Agent 每逢「今天」「明天」都会调用 get_current_datetime
+_LOCAL_TZ = _load_local_tz()
+_WEEKDAY_CN = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+
+
 async def _get_current_datetime(_args: dict) -> Any:
     """返回当前日期时间，供 Agent 计算「今天」「明天」等。"""
-    from datetime import datetime, timezone
     now = datetime.now(timezone.utc)
     # 也返回本地时间常用格式，便于 LLM 理解
-    try:
-        import zoneinfo
-        local = now.astimezone(zoneinfo.ZoneInfo("Asia/Shanghai"))
-    except Exception:
-        local = now
+    local = now.astimezone(_LOCAL_TZ)
     return {
         "iso_utc": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "iso_local": local.strftime("%Y-%m-%dT%H:%M:%S"),
         "date_only": local.strftime("%Y-%m-%d"),
-        "weekday_cn": ["周一", "周二", "周三", "周四", "周五", "周六", "周日"][local.weekday()],
+        "weekday_cn": _WEEKDAY_CN[local.weekday()],
         "hint": "创建日历/待办时，start_date/end_date/due_date 请用与 iso_local 同格式的日期时间，例如今天下午3点即 date_only + 'T15:00:00'",
     }
 
 
-async def _get_statistics(args: dict) -> Any:
-    db = await get_db()
+# 一次查询取回全部统计：来源/审核状态分组 + 内容标签总数；实体总数由来源分组求和得到
+_SQL_STATISTICS = """
+SELECT 'source' AS k, source AS v, COUNT(*) AS cnt FROM entities GROUP BY source
+UNION ALL
+SELECT 'status', review_status, COUNT(*) FROM entities GROUP BY review_status
+UNION ALL
+SELECT 'tags', NULL, COUNT(*) FROM content_tags
+"""
 
-    cursor = await db.execute("SELECT COUNT(*) as cnt FROM entities")
-    total = (await cursor.fetchone())["cnt"]
 
-    cursor = await db.execute(
-        "SELECT source, COUNT(*) as cnt FROM entities GROUP BY source ORDER BY cnt DESC"
-    )
-    by_source = {r["source"]: r["cnt"] for r in await cursor.fetchall()}
-
-    cursor = await db.execute(
-        "SELECT review_status, COUNT(*) as cnt FROM entities GROUP BY review_status"
-    )
-    by_status = {r["review_status"]: r["cnt"] for r in await cursor.fetchall()}
+async def _get_statistics(args: dict) -> Any:
+    async with read_db() as db:
+        cursor = await db.execute(_SQL_STATISTICS)
+        rows = await cursor.fetchall()
 
-    cursor = await db.execute("SELECT COUNT(*) as cnt FROM content_tags")
-    tag_count = (await cursor.fetchone())["cnt"]
+    by_source: dict[str, int] = {}
+    by_status: dict[str, int] = {}
+    tag_count = 0
+    for k, v, cnt in rows:
+        if k == "source":
+            by_source[v] = cnt
+        elif k == "status":
+            by_status[v] = cnt
+        else:
+            tag_count = cnt
 
     return {
-        "total_entities": total,
-        "by_source": by_source,
+        "total_entities": sum(by_source.values()),
+        "by_source": dict(sorted(by_source.items(), key=lambda kv: kv[1], reverse=True)),
         "by_review_status": by_status,
         "content_tag_count": tag_count,
     }
@@ -606,6 +656,25 @@ async def _fetch_apple_data_impl(args: dict, source: str, limit: int, order: str
 
 # ─── Apple 三件套：写入（真正调用系统 App） ───
 
+# 写入系统 App 后的知识库入库在后台进行；持有 Task 引用防止被 GC 提前回收
+_ingest_tasks: set[asyncio.Task] = set()
+
+
+def _ingest_in_background(tool: str, **kwargs: Any) -> str:
+    """Schedule ingest_entity without delaying the tool reply; failures are only logged."""
+    from app.sync.ingest_pipeline import ingest_entity
+
+    async def _run() -> None:
+        try:
+            await ingest_entity(**kwargs)
+        except Exception as e:
+            logger.warning("Agent %s: ingest failed %s", tool, e)
+
+    task = asyncio.create_task(_run())
+    _ingest_tasks.add(task)
+    task.add_done_callback(_ingest_tasks.discard)
+    return "正在记入第二大脑知识库"
+
 
 async def _create_apple_note(args: dict) -> Any:
     try:
@@ -623,15 +692,11 @@ async def _create_apple_note_impl(args: dict) -> Any:
     result = await create_note(title=title, body=body, folder=folder)
     out = {"success": True, "message": "已在「备忘录」中创建", "result": result}
     if args.get("add_to_knowledge_base", True):
-        try:
-            from app.sync.ingest_pipeline import ingest_entity
-            await ingest_entity(
-                title=title, content=body or f"[由 Agent 在 Apple 备忘录创建]",
-                source="agent_apple_notes", created_by="agent", skip_llm=True,
-            )
-            out["knowledge_base"] = "已记入第二大脑知识库"
-        except Exception as e:
-            logger.warning("Agent create_apple_note: ingest failed %s", e)
+        out["knowledge_base"] = _ingest_in_background(
+            "create_apple_note",
+            title=title, content=body or f"[由 Agent 在 Apple 备忘录创建]",
+            source="agent_apple_notes", created_by="agent", skip_llm=True,
+        )
     return out
 
 
@@ -655,16 +720,12 @@ async def _create_apple_reminder_impl(args: dict) -> Any:
     )
     out = {"success": True, "message": "已在「提醒事项」中创建", "result": result}
     if args.get("add_to_knowledge_base", True):
-        try:
-            from app.sync.ingest_pipeline import ingest_entity
-            content = body or f"截止: {due}" if due else "[由 Agent 在 Apple 提醒事项创建]"
-            await ingest_entity(
-                title=title, content=content, source="agent_apple_reminders",
-                created_by="agent", skip_llm=True,
-            )
-            out["knowledge_base"] = "已记入第二大脑知识库"
-        except Exception as e:
-            logger.warning("Agent create_apple_reminder: ingest failed %s", e)
+        content = body or f"截止: {due}" if due else "[由 Agent 在 Apple 提醒事项创建]"
+        out["knowledge_base"] = _ingest_in_background(
+            "create_apple_reminder",
+            title=title, content=content, source="agent_apple_reminders",
+            created_by="agent", skip_llm=True,
+        )
     return out
 
 
@@ -694,20 +755,16 @@ async def _create_apple_event_impl(args: dict, title: str, start: str, end: str)
     )
     out = {"success": True, "message": "已在「日历」中创建", "result": result}
     if args.get("add_to_knowledge_base", True):
-        try:
-            from app.sync.ingest_pipeline import ingest_entity
-            content = f"{start} ~ {end}"
-            if desc:
-                content += f"\n\n{desc}"
-            if loc:
-                content += f"\n地点: {loc}"
-            await ingest_entity(
-                title=title, content=content, source="agent_apple_calendar",
-                created_by="agent", skip_llm=True,
-            )
-            out["knowledge_base"] = "已记入第二大脑知识库"
-        except Exception as e:
-            logger.warning("Agent create_apple_event: ingest failed %s", e)
+        content = f"{start} ~ {end}"
+        if desc:
+            content += f"\n\n{desc}"
+        if loc:
+            content += f"\n地点: {loc}"
+        out["knowledge_base"] = _ingest_in_background(
+            "create_apple_event",
+            title=title, content=content, source="agent_apple_calendar",
+            created_by="agent", skip_llm=True,
+        )
     return out
 
 
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import uuid
@@ -68,6 +69,33 @@ async def get_conversation_messages(
     return rows
 
 
+def _etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def conversations_etag(conversations: list[dict], limit: int = 50) -> str:
+    """Version tag for a list_conversations result, hashed from the rows it returned.
+
+    COUNT + 秒级 MAX(updated_at) 无法感知同一秒内的改名与排序变化；直接按返回的行（含顺序）计算，
+    列表内容变了标签必然变，且不需要额外查询。
+    """
+    return _etag(limit, *(
+        f"{c['id']}\x1f{c['updated_at']}\x1f{c['title']}\x1f{c['summary']}" for c in conversations
+    ))
+
+
+async def messages_etag(conversation_id: str, limit: int = 100) -> str:
+    """Cheap version tag for get_conversation_messages (messages are append-only)."""
+    db = await get_db()
+    cursor = await db.execute(
+        "SELECT COUNT(*) AS cnt, MAX(created_at) AS last FROM messages WHERE conversation_id = ?",
+        (conversation_id,),
+    )
+    row = await cursor.fetchone()
+    return _etag(conversation_id, limit, row["cnt"], row["last"])
+
+
 async def add_message(
     conversation_id: str,
     role: str,
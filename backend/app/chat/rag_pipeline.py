@@ -6,9 +6,10 @@ Implements the core retrieval-augmented generation flow for the Q&A system.
 from __future__ import annotations
 
 import logging
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 
-from app.services.llm_service import chat_completion, check_available
+from app.services.llm_service import chat_completion, chat_completion_stream, check_available
 from app.services.embedding_service import semantic_search
 from app.storage.neo4j_client import is_available as neo4j_available, run_cypher
 from app.storage.sqlite_client import get_db
@@ -44,23 +45,57 @@ async def run_rag(
     """Execute the full RAG pipeline."""
     ctx = RAGContext(query=query, rewritten_query=query)
 
+    if not await _retrieve(ctx, history, top_k):
+        return ctx
+
+    answer, sources = await _generate_answer(ctx)
+    ctx.answer = answer
+    ctx.sources = sources
+
+    return ctx
+
+
+async def run_rag_stream(
+    ctx: RAGContext,
+    history: list[dict] | None = None,
+    top_k: int = 5,
+) -> AsyncIterator[str]:
+    """Streaming variant of run_rag: yields answer tokens as the LLM produces them.
+
+    ctx.sources is filled before the first token; ctx.answer holds the full text once exhausted.
+    """
+    if not await _retrieve(ctx, history, top_k):
+        yield ctx.answer
+        return
+
+    messages, ctx.sources = _build_answer_prompt(ctx)
+    parts: list[str] = []
+    try:
+        async for token in chat_completion_stream(messages, temperature=0.3, max_tokens=2048):
+            parts.append(token)
+            yield token
+    except Exception as e:
+        logger.error("Answer generation failed: %s", e)
+        err = f"生成回答时出错: {e}"
+        parts.append(err)
+        yield err
+    ctx.answer = "".join(parts)
+
+
+async def _retrieve(ctx: RAGContext, history: list[dict] | None, top_k: int) -> bool:
+    """Rewrite query + hybrid/graph retrieval into ctx. Returns False if the LLM is unavailable."""
     if not await check_available():
         ctx.answer = "LLM 服务不可用，无法生成回答。请检查 LLM API 配置。"
-        return ctx
+        return False
 
     if history:
-        ctx.rewritten_query = await _rewrite_query(query, history)
+        ctx.rewritten_query = await _rewrite_query(ctx.query, history)
 
     ctx.results = await _hybrid_retrieve(ctx.rewritten_query, top_k)
 
     graph_ctx = await _graph_retrieve(ctx.rewritten_query)
     ctx.graph_context = graph_ctx
-
-    answer, sources = await _generate_answer(ctx)
-    ctx.answer = answer
-    ctx.sources = sources
-
-    return ctx
+    return True
 
 
 async def _rewrite_query(query: str, history: list[dict]) -> str:
@@ -183,8 +218,8 @@ async def _graph_retrieve(query: str) -> str:
         return ""
 
 
-async def _generate_answer(ctx: RAGContext) -> tuple[str, list[dict]]:
-    """Build context and generate LLM answer with source citations."""
+def _build_answer_prompt(ctx: RAGContext) -> tuple[list[dict[str, str]], list[dict]]:
+    """Build the answer-generation messages and source citations from retrieved context."""
     context_parts = []
     sources = []
 
@@ -216,15 +251,18 @@ async def _generate_answer(ctx: RAGContext) -> tuple[str, list[dict]]:
 
 用户问题：{ctx.query}"""
 
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    return messages, sources
+
+
+async def _generate_answer(ctx: RAGContext) -> tuple[str, list[dict]]:
+    """Build context and generate LLM answer with source citations."""
+    messages, sources = _build_answer_prompt(ctx)
     try:
-        answer = await chat_completion(
-            [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.3,
-            max_tokens=2048,
-        )
+        answer = await chat_completion(messages, temperature=0.3, max_tokens=2048)
         return answer, sources
     except Exception as e:
         logger.error("Answer generation failed: %s", e)
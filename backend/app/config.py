@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import time
 from pathlib import Path
 from functools import lru_cache
 
@@ -23,6 +24,7 @@ class Settings(BaseSettings):
     jwt_secret: str = "please-change-this-to-a-random-string"
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 1440  # 24h
+    bcrypt_rounds: int = 12  # 开发/测试环境可调低（如 4）
 
     # Paths
     obsidian_vault_path: str = "~/Documents/ObsidianVault"
@@ -33,6 +35,9 @@ class Settings(BaseSettings):
     frontend_port: int = 3000
     milvus_port: int = 19530
 
+    # SQLite
+    sqlite_read_pool_size: int = 4  # 只读连接数（搜索、统计等热点读路径）
+
     # Vector DB
     vector_db_mode: str = "milvus-lite"
 
@@ -42,6 +47,9 @@ class Settings(BaseSettings):
     embedding_model: str = "bge-m3"
     embedding_dim: int = 1024
 
+    # Search
+    hybrid_vector_confidence_threshold: float = 0.8  # 向量首条相似度达到该值且结果满页时，hybrid 跳过关键词检索
+
     # Neo4j
     neo4j_user: str = "neo4j"
     neo4j_password: str = "dierdanao123"
@@ -100,24 +108,50 @@ def _apply_user_overrides(settings: Settings):
 class UserConfig:
     """Loads and manages user_config.yaml (tag system, sync rules, roles)."""
 
+    STAT_INTERVAL = 1.0
+
     def __init__(self, config_path: Path | None = None):
         self._config_path = config_path or (
             _project_root() / "backend" / "config" / "user_config.yaml"
         )
         self._data: dict = {}
+        self._mtime_ns: int | None = None
+        self._checked_at = 0.0
         self.reload()
 
+    def _stat_mtime_ns(self) -> int | None:
+        try:
+            return os.stat(self._config_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
     def reload(self):
-        if self._config_path.exists():
+        self._mtime_ns = self._stat_mtime_ns()
+        if self._mtime_ns is not None:
             with open(self._config_path, "r", encoding="utf-8") as f:
                 self._data = yaml.safe_load(f) or {}
         else:
             self._data = {}
 
+    def reload_if_changed(self):
+        """Re-parse the YAML only when the file was modified outside this process.
+
+        The stat() itself is throttled to once per STAT_INTERVAL; this process's own writes
+        already live in memory, so only external edits see the (sub-second) delay.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.STAT_INTERVAL:
+            return
+        self._checked_at = now
+        if self._stat_mtime_ns() != self._mtime_ns:
+            self.reload()
+
     def save(self):
         self._config_path.parent.mkdir(parents=True, exist_ok=True)
         with open(self._config_path, "w", encoding="utf-8") as f:
             yaml.dump(self._data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        # 记录自身写入后的 mtime，下次读取无需重新解析
+        self._mtime_ns = self._stat_mtime_ns()
 
     @property
     def data(self) -> dict:
@@ -138,7 +172,10 @@ _user_config: UserConfig | None = None
 
 
 def get_user_config() -> UserConfig:
+    """Return the shared in-memory UserConfig; YAML re-parsed only on external edits."""
     global _user_config
     if _user_config is None:
         _user_config = UserConfig()
+    else:
+        _user_config.reload_if_changed()
     return _user_config
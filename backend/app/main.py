@@ -5,17 +5,24 @@ from __future__ import annotations
 import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import get_settings
+from app.services import config_writer
 from app.storage.sqlite_client import init_db, close_db
+from app.sync.messages import APPLE_JXA_USER_MESSAGE, AppleJXAError
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    from app.sync import jobs as sync_jobs
+    # 上次进程遗留的 running 记录不会再完成，启动时即释放来源锁
+    await sync_jobs.expire_running()
     await _ensure_admin_user()
+    config_writer.start()
 
     # Pre-connect Milvus (non-blocking: lite mode is instant, standalone may not be ready)
     try:
@@ -49,12 +56,17 @@ async def lifespan(app: FastAPI):
             _scheduler.shutdown(wait=False)
         except Exception:
             pass
+    # 先取消后台同步任务并等待其写入“已取消”结果，再关闭数据库
+    await sync_jobs.cancel_all()
+    from app.api.version import close_client as close_version_client
     from app.services.llm_service import close_client
     from app.storage.milvus_client import close_milvus
     from app.storage.neo4j_client import close_neo4j
     await close_client()
+    await close_version_client()
     await close_milvus()
     await close_neo4j()
+    await config_writer.stop()
     await close_db()
 
 
@@ -65,8 +77,15 @@ app = FastAPI(
     description="人生价值系统 API",
     version=get_local_version(),
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+if get_settings().auth_mode == "single":
+    # 单用户模式：跳过 HTTPBearer 解析与整条认证依赖链
+    from app.auth.dependencies import get_admin_user, get_current_user, single_mode_user
+    app.dependency_overrides[get_current_user] = single_mode_user
+    app.dependency_overrides[get_admin_user] = single_mode_user
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -76,6 +95,13 @@ app.add_middleware(
 )
 
 
+@app.exception_handler(AppleJXAError)
+async def apple_jxa_error_handler(request: Request, exc: AppleJXAError):
+    import logging
+    logging.getLogger(__name__).error("Apple JXA failed on %s: %s", request.url.path, exc)
+    return ORJSONResponse(status_code=503, content={"detail": APPLE_JXA_USER_MESSAGE})
+
+
 @app.get("/health")
 async def health_check():
     from app.storage.milvus_client import get_collection_stats
@@ -99,10 +125,10 @@ async def _ensure_admin_user():
     admin = await row.fetchone()
 
     if admin is None:
-        from passlib.hash import bcrypt
+        from app.auth.password import hash_password
         import uuid
 
-        password_hash = bcrypt.hash(settings.admin_password)
+        password_hash = await hash_password(settings.admin_password)
         await db.execute(
             "INSERT INTO users (id, username, password_hash, display_name, role) VALUES (?, ?, ?, ?, ?)",
             (str(uuid.uuid4()), settings.admin_username, password_hash, "管理员", "admin"),
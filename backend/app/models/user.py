@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class UserCreate(BaseModel):
@@ -27,6 +27,9 @@ class UserOut(BaseModel):
     created_at: str
     last_login_at: str | None
 
+    # 角色权限，由 get_current_user 随用户一起查出；不参与序列化
+    _permissions: frozenset[str] = PrivateAttr(default_factory=frozenset)
+
 
 class UserInDB(UserOut):
     password_hash: str
@@ -0,0 +1,89 @@
+"""Coalesced writes of user_config.yaml.
+
+submit() applies the change to the in-memory UserConfig immediately (so reads see it
+at once) and queues a save; a background task writes the file at most once per
+FLUSH_INTERVAL, or sooner once MAX_PENDING updates have queued up.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from app.config import get_user_config
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.5
+MAX_PENDING = 32
+
+_queue: asyncio.Queue[str] | None = None
+_task: asyncio.Task | None = None
+# 有已提交但尚未落盘的修改；_run 可能已从队列取走请求，stop() 据此判断是否需要补写
+_dirty = False
+
+
+def start() -> None:
+    global _queue, _task
+    if _task is None:
+        _queue = asyncio.Queue()
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    """Stop the writer and flush anything still pending."""
+    global _queue, _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    if _dirty:
+        _save()
+    _queue = None
+    _task = None
+
+
+async def submit(key: str, value) -> None:
+    global _dirty
+    user_config = get_user_config()
+    user_config.set(key, value)
+    _dirty = True
+    if _queue is None:
+        # 写入任务未启动（如脚本中调用）时直接落盘
+        _save()
+        return
+    _queue.put_nowait(key)
+
+
+def _save() -> None:
+    global _dirty
+    _dirty = False
+    try:
+        get_user_config().save()
+    except Exception as e:
+        logger.error("Failed to save user config: %s", e)
+
+
+async def _run() -> None:
+    assert _queue is not None
+    while True:
+        await _queue.get()
+        pending = 1
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while pending < MAX_PENDING:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            pending += 1
+        # 清空在本轮窗口内到达的其余请求，一次写盘全部覆盖
+        while not _queue.empty():
+            _queue.get_nowait()
+        _save()
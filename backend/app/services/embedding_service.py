@@ -9,14 +9,19 @@ from __future__ import annotations
 import json
 import logging
 
-from app.services.llm_service import get_embedding, check_available
-from app.storage.milvus_client import upsert_vector, delete_vector, search_vectors
+from app.config import get_settings
+from app.services.llm_service import get_embedding, get_embeddings_batch, check_available
+from app.services.query_cache import QueryCache, query_cache
+from app.storage.milvus_client import upsert_vector, upsert_vectors, vector_row, delete_vector, search_vectors
 from app.storage.sqlite_client import get_db
 
 logger = logging.getLogger(__name__)
 
 MAX_EMBED_LENGTH = 8000
 
+# 查询向量缓存：同一查询在检索、重排等阶段复用，避免重复调用 embedding 接口
+_query_embedding_cache = QueryCache(max_size=2048, ttl_seconds=3600)
+
 
 def _prepare_text(title: str, content: str, max_len: int = MAX_EMBED_LENGTH) -> str:
     """Prepare text for embedding: title + content, truncated to max length."""
@@ -60,14 +65,8 @@ async def _fetch_entity_tags(db, entity_id: str) -> tuple[list[str], list[str]]:
     return folder_tags, content_tags
 
 
-async def embed_entity(entity_id: str) -> bool:
-    """向量化单个实体并存入 Milvus（含 folder_tags / content_tags 元数据）。"""
-    llm_ok = await check_available()
-    if not llm_ok:
-        logger.warning("LLM 不可用，无法向量化 entity %s", entity_id)
-        return False
-
-    db = await get_db()
+async def _load_embed_input(db, entity_id: str) -> tuple[str, str, dict] | None:
+    """读取实体并准备向量化输入：(text, source, extra_fields)；实体不存在或无内容时返回 None。"""
     cursor = await db.execute(
         "SELECT id, title, content, source, content_type FROM entities WHERE id = ?",
         (entity_id,),
@@ -75,29 +74,44 @@ async def embed_entity(entity_id: str) -> bool:
     entity = await cursor.fetchone()
     if entity is None:
         logger.warning("Entity %s not found for embedding", entity_id)
-        return False
+        return None
 
-    entity = dict(entity)
     text = _prepare_text(entity["title"] or "", entity["content"] or "")
     if not text:
         logger.warning("Entity %s has no content to embed", entity_id)
+        return None
+
+    folder_tags, content_tags = await _fetch_entity_tags(db, entity_id)
+    extra_fields = {
+        "content_type": entity["content_type"] or "text",
+        "folder_tags": json.dumps(folder_tags, ensure_ascii=False),
+        "content_tags": json.dumps(content_tags, ensure_ascii=False),
+    }
+    return text, entity["source"], extra_fields
+
+
+async def embed_entity(entity_id: str) -> bool:
+    """向量化单个实体并存入 Milvus（含 folder_tags / content_tags 元数据）。"""
+    llm_ok = await check_available()
+    if not llm_ok:
+        logger.warning("LLM 不可用，无法向量化 entity %s", entity_id)
         return False
 
+    db = await get_db()
+    prepared = await _load_embed_input(db, entity_id)
+    if prepared is None:
+        return False
+    text, source, extra_fields = prepared
+
     try:
         embedding = await get_embedding(text)
 
-        folder_tags, content_tags = await _fetch_entity_tags(db, entity_id)
-
         await upsert_vector(
             entity_id=entity_id,
             embedding=embedding,
             text_preview=text[:500],
-            source=entity["source"],
-            extra_fields={
-                "content_type": entity["content_type"] or "text",
-                "folder_tags": json.dumps(folder_tags, ensure_ascii=False),
-                "content_tags": json.dumps(content_tags, ensure_ascii=False),
-            },
+            source=source,
+            extra_fields=extra_fields,
         )
 
         await db.execute(
@@ -106,7 +120,7 @@ async def embed_entity(entity_id: str) -> bool:
         )
         await db.commit()
         logger.info("Embedded entity %s (%d dims, folders=%s, tags=%s)",
-                     entity_id, len(embedding), folder_tags, content_tags)
+                     entity_id, len(embedding), extra_fields["folder_tags"], extra_fields["content_tags"])
         return True
 
     except Exception as e:
@@ -114,6 +128,44 @@ async def embed_entity(entity_id: str) -> bool:
         return False
 
 
+async def embed_entities(entity_ids: list[str]) -> list[str]:
+    """批量向量化：一次 embedding 请求 + 一次 Milvus upsert + 一次 SQLite 批量更新。
+
+    返回成功向量化的实体 ID。
+    """
+    if not entity_ids or not await check_available():
+        return []
+
+    db = await get_db()
+    ids: list[str] = []
+    inputs: list[tuple[str, str, dict]] = []
+    for eid in entity_ids:
+        prepared = await _load_embed_input(db, eid)
+        if prepared is not None:
+            ids.append(eid)
+            inputs.append(prepared)
+    if not ids:
+        return []
+
+    try:
+        embeddings = await get_embeddings_batch([text for text, _, _ in inputs])
+        await upsert_vectors([
+            vector_row(eid, emb, text[:500], source, extra_fields)
+            for eid, emb, (text, source, extra_fields) in zip(ids, embeddings, inputs)
+        ])
+        await db.executemany(
+            "UPDATE entities SET milvus_id = ?, synced_at = datetime('now') WHERE id = ?",
+            [(eid, eid) for eid in ids],
+        )
+        await db.commit()
+    except Exception as e:
+        logger.error("Batch embedding of %d entities failed: %s", len(ids), e, exc_info=True)
+        return []
+
+    logger.info("Embedded %d entities in one batch", len(ids))
+    return ids
+
+
 async def embed_entities_batch(entity_ids: list[str]) -> dict:
     """Embed multiple entities. Returns {success: int, failed: int, skipped: int}."""
     result = {"success": 0, "failed": 0, "skipped": 0}
@@ -170,24 +222,40 @@ def _build_filter_expr(
     return " and ".join(parts) if parts else None
 
 
+async def embed_query(query: str) -> list[float]:
+    """Embed a search query, cached per (embedding model, stripped query)."""
+    query = query.strip()
+    key = QueryCache.make_key(get_settings().embedding_model, query)
+    embedding = await _query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = await get_embedding(query)
+        await _query_embedding_cache.put(key, embedding)
+    return embedding
+
+
 async def semantic_search(
     query: str,
     top_k: int = 10,
     source_filter: str | None = None,
     folder_filter: str | None = None,
     tag_filter: str | None = None,
+    query_embedding: list[float] | None = None,
 ) -> list[dict]:
-    """语义搜索，支持按 source / folder / content_tag 过滤。"""
-    llm_ok = await check_available()
-    if not llm_ok:
-        logger.warning("LLM unavailable for semantic search")
-        return []
-
-    try:
-        query_embedding = await get_embedding(query)
-    except Exception as e:
-        logger.error("Failed to get query embedding: %s", e)
-        return []
+    """语义搜索，支持按 source / folder / content_tag 过滤。
+
+    已有查询向量（如来自 embed_query）时可通过 query_embedding 传入，跳过 embedding 调用。
+    """
+    if query_embedding is None:
+        llm_ok = await check_available()
+        if not llm_ok:
+            logger.warning("LLM unavailable for semantic search")
+            return []
+
+        try:
+            query_embedding = await embed_query(query)
+        except Exception as e:
+            logger.error("Failed to get query embedding: %s", e)
+            return []
 
     filters = _build_filter_expr(source_filter, folder_filter, tag_filter)
 
@@ -212,6 +280,29 @@ async def semantic_search(
     return enriched
 
 
+async def cached_semantic_search(
+    query: str,
+    top_k: int = 10,
+    source_filter: str | None = None,
+    folder_filter: str | None = None,
+    tag_filter: str | None = None,
+) -> list[dict]:
+    """semantic_search with results memoized in the shared query_cache.
+
+    查询先折叠空白、忽略大小写再作缓存键，仅格式不同的重复提问直接命中；入库与审核通过时整体清空。
+    空结果不缓存（可能只是 LLM 暂不可用）。
+    """
+    key = QueryCache.make_key(" ".join(query.split()).casefold(), top_k, source_filter, folder_filter, tag_filter)
+    hits = await query_cache.get(key)
+    if hits is None:
+        hits = await semantic_search(
+            query, top_k=top_k, source_filter=source_filter, folder_filter=folder_filter, tag_filter=tag_filter,
+        )
+        if hits:
+            await query_cache.put(key, hits)
+    return hits
+
+
 async def remove_entity_embedding(entity_id: str) -> None:
     """Remove an entity's vector from Milvus."""
     try:
@@ -7,10 +7,14 @@ Falls back gracefully when deps are missing. Video requires ffmpeg on PATH.
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import hashlib
 import logging
 import mimetypes
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +23,41 @@ mimetypes.add_type("application/vnd.openxmlformats-officedocument.wordprocessing
 mimetypes.add_type("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx")
 mimetypes.add_type("application/vnd.openxmlformats-officedocument.presentationml.presentation", ".pptx")
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+@lru_cache(maxsize=8)
+def _ensure_dir(path: Path) -> Path:
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def get_upload_dir() -> Path:
+    """data_dir/uploads；目录只在首次使用时创建，之后不再每次请求 mkdir。"""
+    from app.config import get_settings
+    return _ensure_dir(get_settings().resolved_data_dir / "uploads")
+
+
+def save_upload(src: BinaryIO, dest: Path) -> str:
+    """Copy an uploaded (spooled) file to dest in chunks, returning its SHA-256 hex digest.
+
+    The hash is computed on the same chunks as they are written, so the file is read only once.
+    Blocking: call via asyncio.to_thread.
+    """
+    src.seek(0)
+    digest = hashlib.sha256()
+    with open(dest, "wb") as out:
+        while chunk := src.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
 
 async def extract_text(file_path: str | Path, content_type: str | None = None) -> str:
-    """Extract text from any file and return as Markdown."""
+    """Extract text from any file and return as Markdown.
+
+    Local parsers (text/docx/xlsx/pdf) are blocking and run in a worker thread.
+    """
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {path}")
@@ -36,19 +72,19 @@ async def extract_text(file_path: str | Path, content_type: str | None = None) -
     # Text-based files (check extension first since MIME detection is unreliable)
     TEXT_EXTS = {".txt", ".md", ".markdown", ".csv", ".html", ".htm", ".json", ".xml", ".yaml", ".yml", ".log", ".ini", ".cfg", ".conf", ".toml", ".rst", ".tex"}
     if ext in TEXT_EXTS or content_type in ("text/plain", "text/markdown", "text/csv", "text/html", "application/json"):
-        return _read_text(path)
+        return await asyncio.to_thread(_read_text, path)
 
     # Word documents
     if ext in (".docx",) or "wordprocessingml" in content_type:
-        return _extract_docx(path)
+        return await asyncio.to_thread(_extract_docx, path)
 
     # Excel
     if ext in (".xlsx",) or "spreadsheetml" in content_type:
-        return _extract_xlsx(path)
+        return await asyncio.to_thread(_extract_xlsx, path)
 
     # PDF
     if ext == ".pdf" or content_type == "application/pdf":
-        return _extract_pdf(path)
+        return await asyncio.to_thread(_extract_pdf, path)
 
     # Images → OpenAI Vision
     if content_type.startswith("image/") or ext in (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"):
@@ -66,12 +102,14 @@ async def extract_text(file_path: str | Path, content_type: str | None = None) -
 
 
 def _read_text(path: Path) -> str:
+    # 只读一次文件，依次尝试编码解码
+    raw = path.read_bytes()
     for enc in ("utf-8", "gbk", "gb2312", "latin-1"):
         try:
-            return path.read_text(encoding=enc)
+            return raw.decode(enc)
         except (UnicodeDecodeError, LookupError):
             continue
-    return path.read_text(encoding="utf-8", errors="replace")
+    return raw.decode("utf-8", errors="replace")
 
 
 def _extract_docx(path: Path) -> str:
@@ -175,7 +213,7 @@ async def _extract_image_vision(path: Path) -> str:
     if not api_key:
         return f"[图片: {path.name}] (需要配置 LLM API Key 才能进行图片识别)"
 
-    data = base64.b64encode(path.read_bytes()).decode("utf-8")
+    data = await asyncio.to_thread(lambda: base64.b64encode(path.read_bytes()).decode("utf-8"))
     ext = path.suffix.lower().lstrip(".")
     mime_map = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "gif": "gif", "webp": "webp", "bmp": "bmp"}
     mime = f"image/{mime_map.get(ext, ext)}"
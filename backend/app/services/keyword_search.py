@@ -0,0 +1,65 @@
+"""Keyword search over entity title/content: FTS5 (trigram) with a LIKE fallback for short queries.
+
+Shared by the hybrid search API and the agent's search_knowledge tool.
+"""
+
+from __future__ import annotations
+
+from app.storage.sqlite_client import read_db
+
+# trigram 分词无法匹配少于 3 个字符的查询，这类查询回退到 LIKE 扫描
+_FTS_MIN_QUERY_LEN = 3
+
+_SQL_META_FTS = (
+    "SELECT e.id, e.title, substr(e.content, 1, 300) AS content, e.source, e.obsidian_path "
+    "FROM entities_fts f JOIN entities e ON e.rowid = f.rowid "
+    "WHERE entities_fts MATCH ?{source_clause} ORDER BY bm25(entities_fts) LIMIT ?"
+)
+_SQL_META_LIKE = (
+    "SELECT id, title, substr(content, 1, 300) AS content, source, obsidian_path "
+    "FROM entities WHERE (title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\'){source_clause} "
+    "ORDER BY updated_at DESC LIMIT ?"
+)
+# 有无来源过滤各一条固定 SQL 文本，保证语句缓存命中
+_SQL_META: dict[tuple[bool, bool], str] = {
+    (True, False): _SQL_META_FTS.format(source_clause=""),
+    (True, True): _SQL_META_FTS.format(source_clause=" AND e.source = ?"),
+    (False, False): _SQL_META_LIKE.format(source_clause=""),
+    (False, True): _SQL_META_LIKE.format(source_clause=" AND source = ?"),
+}
+
+
+def _fts_phrase(query: str) -> str:
+    """Quote the raw query as a single FTS5 phrase (substring match under the trigram tokenizer)."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards so % and _ in the query match literally (used with ESCAPE '\\')."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def keyword_search(query: str, top_k: int = 10, source: str | None = None) -> list[dict]:
+    """SQLite full-text search on title and content."""
+    query = query.strip()
+    use_fts = len(query) >= _FTS_MIN_QUERY_LEN
+    if use_fts:
+        params: list = [_fts_phrase(query)]
+    else:
+        pattern = f"%{_escape_like(query)}%"
+        params = [pattern, pattern]
+    if source:
+        params.append(source)
+    params.append(top_k)
+
+    async with read_db() as db:
+        cursor = await db.execute(_SQL_META[(use_fts, bool(source))], params)
+        rows = await cursor.fetchmany(top_k)
+        await cursor.close()
+    return [
+        {
+            "id": r["id"], "title": r["title"], "content": r["content"],
+            "source": r["source"], "obsidian_path": r["obsidian_path"],
+        }
+        for r in rows
+    ]
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import json
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
@@ -96,6 +98,53 @@ async def chat_completion(
         raise RuntimeError(f"LLM API unavailable: {e}") from e
 
 
+async def chat_completion_stream(
+    messages: list[dict[str, str]],
+    *,
+    model: str | None = None,
+    temperature: float = 0.3,
+    max_tokens: int = 2048,
+) -> AsyncIterator[str]:
+    """Stream chat completion (stream=True). Yields content deltas as they arrive."""
+    settings = get_settings()
+    client = await _get_client()
+    url = f"{settings.llm_api_url.rstrip('/')}/chat/completions"
+
+    payload: dict[str, Any] = {
+        "model": model or settings.llm_model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True,
+    }
+
+    try:
+        async with client.stream("POST", url, json=payload, headers=_auth_headers()) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+    except httpx.HTTPStatusError as e:
+        logger.error("LLM stream error: %s", e.response.status_code)
+        raise RuntimeError(f"LLM API error: {e.response.status_code}") from e
+    except Exception as e:
+        logger.error("LLM stream failed: %s", e)
+        raise RuntimeError(f"LLM API unavailable: {e}") from e
+
+
 async def get_embedding(text: str, *, model: str | None = None) -> list[float]:
     """Get embedding vector for a single text."""
     settings = get_settings()
@@ -0,0 +1,64 @@
+"""In-process TTL + LRU cache for semantic search results.
+
+Repeated queries skip the embedding call and the Milvus round-trip. Entries
+expire after ``ttl_seconds``; ingest and review approval call ``clear()`` so
+newly indexed content shows up without waiting for expiry.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class QueryCache:
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: object) -> bytes:
+        return hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=16).digest()
+
+    async def get(self, key: bytes) -> Any | None:
+        async with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    async def put(self, key: bytes, value: Any) -> None:
+        async with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+query_cache = QueryCache()
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import sqlite3
+import time
 import uuid
 
-from app.storage.sqlite_client import get_db
+from app.services.query_cache import query_cache
+from app.storage.sqlite_client import get_db, run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +38,7 @@ async def create_review_item(
         ),
     )
     await db.commit()
+    invalidate_counts()
     logger.info("Created review item %s for entity %s", review_id, entity_id)
     return review_id
 
@@ -93,6 +98,35 @@ async def get_stats() -> dict:
     return stats
 
 
+# 角标与统计面板轮询 /count、/stats：短 TTL 缓存合并突发请求，审核状态变化时立即失效
+_COUNTS_TTL = 2.0
+_BATCH_APPROVE_CONCURRENCY = 4
+_counts_cache: dict[str, tuple[float, int | dict]] = {}
+_counts_lock = asyncio.Lock()
+
+
+async def _cached(key: str, loader):
+    async with _counts_lock:
+        hit = _counts_cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < _COUNTS_TTL:
+            return hit[1]
+        value = await loader()
+        _counts_cache[key] = (time.monotonic(), value)
+        return value
+
+
+def invalidate_counts() -> None:
+    _counts_cache.clear()
+
+
+async def get_pending_count_cached() -> int:
+    return await _cached("pending_count", get_pending_count)
+
+
+async def get_stats_cached() -> dict:
+    return dict(await _cached("stats", get_stats))
+
+
 def _parse_json_fields(rows: list[dict]) -> list[dict]:
     for row in rows:
         for key in ("suggested_folder_tags", "suggested_content_tags", "suggested_status", "confidence_scores", "reviewer_action"):
@@ -104,19 +138,21 @@ def _parse_json_fields(rows: list[dict]) -> list[dict]:
     return rows
 
 
-async def approve_item(review_id: str, modifications: dict | None = None) -> dict:
-    """Approve a review item, optionally with modifications.
+def _load_json(val, default):
+    return json.loads(val) if isinstance(val, str) else (val or default)
 
-    If modifications is provided, the modified tags are used instead of the suggestions.
-    """
-    db = await get_db()
 
-    cursor = await db.execute("SELECT * FROM review_queue WHERE id = ?", (review_id,))
-    item = await cursor.fetchone()
+def _approve_in_db(
+    conn: sqlite3.Connection, review_id: str, modifications: dict | None,
+) -> tuple[dict, list[str], list[str], dict, str | None]:
+    """审核落库：review_queue、entity_tags、entities 在同一事务内写入（由 run_sync 提交/回滚）。
+
+    Returns (action, folder_tags, content_tags, status_values, obsidian_path).
+    """
+    item = conn.execute("SELECT * FROM review_queue WHERE id = ?", (review_id,)).fetchone()
     if item is None:
         raise ValueError("Review item not found")
 
-    item = dict(item)
     status = "approved" if modifications is None else "modified"
 
     folder_tags = modifications.get("folder_tags") if modifications else None
@@ -124,14 +160,11 @@ async def approve_item(review_id: str, modifications: dict | None = None) -> dic
     status_values = modifications.get("status") if modifications else None
 
     if folder_tags is None:
-        val = item["suggested_folder_tags"]
-        folder_tags = json.loads(val) if isinstance(val, str) else (val or [])
+        folder_tags = _load_json(item["suggested_folder_tags"], [])
     if content_tags is None:
-        val = item["suggested_content_tags"]
-        content_tags = json.loads(val) if isinstance(val, str) else (val or [])
+        content_tags = _load_json(item["suggested_content_tags"], [])
     if status_values is None:
-        val = item["suggested_status"]
-        status_values = json.loads(val) if isinstance(val, str) else (val or {})
+        status_values = _load_json(item["suggested_status"], {})
 
     action = {
         "status": status,
@@ -142,7 +175,7 @@ async def approve_item(review_id: str, modifications: dict | None = None) -> dic
     if modifications:
         action["modifications"] = modifications
 
-    await db.execute(
+    conn.execute(
         """UPDATE review_queue
            SET status = ?, reviewer_action = ?, reviewed_at = datetime('now')
            WHERE id = ?""",
@@ -151,19 +184,50 @@ async def approve_item(review_id: str, modifications: dict | None = None) -> dic
 
     # Apply tags to entity
     entity_id = item["entity_id"]
-    await _apply_tags_to_entity(entity_id, folder_tags, content_tags, status_values)
+    _apply_tags_to_entity(conn, entity_id, folder_tags, content_tags, status_values)
 
-    await db.execute(
-        "UPDATE entities SET review_status = 'reviewed', updated_at = datetime('now') WHERE id = ?",
+    rows = conn.execute(
+        "UPDATE entities SET review_status = 'reviewed', updated_at = datetime('now') WHERE id = ? "
+        "RETURNING obsidian_path",
         (entity_id,),
-    )
-    await db.commit()
+    ).fetchall()
+    action["entity_id"] = entity_id
+    return action, folder_tags, content_tags, status_values, rows[0]["obsidian_path"] if rows else None
+
+
+async def approve_item(review_id: str, modifications: dict | None = None, *, embed: bool = True) -> dict:
+    """Approve a review item, optionally with modifications.
+
+    If modifications is provided, the modified tags are used instead of the suggestions.
+    embed=False skips vectorization so a batch caller can embed all entities at once.
+    """
+    approved = await _approve_and_log(review_id, modifications)
+    return await _after_approve(*approved, embed=embed)
+
+
+async def _approve_and_log(review_id: str, modifications: dict | None = None) -> tuple:
+    approved = await run_sync(lambda conn: _approve_in_db(conn, review_id, modifications))
+    invalidate_counts()
+    action = approved[0]
+    logger.info("Approved review %s (status: %s) for entity %s", review_id, action["status"], action["entity_id"])
+    return approved
+
+
+async def _after_approve(
+    action: dict,
+    folder_tags: list[str],
+    content_tags: list[str],
+    status_values: dict,
+    obsidian_path: str | None,
+    *,
+    embed: bool,
+) -> dict:
+    """审核落库后的 I/O 后处理：移动 Obsidian 笔记、向量化、知识图谱抽取。"""
+    entity_id = action["entity_id"]
 
     # Move note to folder tag directory, then update frontmatter
-    cursor = await db.execute("SELECT obsidian_path FROM entities WHERE id = ?", (entity_id,))
-    entity_row = await cursor.fetchone()
-    if entity_row and entity_row["obsidian_path"]:
-        current_path = entity_row["obsidian_path"]
+    if obsidian_path:
+        current_path = obsidian_path
         try:
             from app.sync.obsidian_writer import move_note_to_folder, update_note_frontmatter
 
@@ -172,11 +236,9 @@ async def approve_item(review_id: str, modifications: dict | None = None) -> dic
                 new_path = await move_note_to_folder(current_path, folder_tags[0])
                 if new_path and new_path != current_path:
                     current_path = new_path
-                    await db.execute(
-                        "UPDATE entities SET obsidian_path = ? WHERE id = ?",
-                        (current_path, entity_id),
-                    )
-                    await db.commit()
+                    await run_sync(lambda conn: conn.execute(
+                        "UPDATE entities SET obsidian_path = ? WHERE id = ?", (new_path, entity_id),
+                    ))
 
             # Step 2: Update frontmatter with tags
             fm_updates: dict = {"review_status": "reviewed"}
@@ -194,13 +256,14 @@ async def approve_item(review_id: str, modifications: dict | None = None) -> dic
     embed_ok = False
     extract_status = "skipped"
 
-    try:
-        from app.services.embedding_service import embed_entity
-        embed_ok = await embed_entity(entity_id)
-        if not embed_ok:
-            logger.error("向量化失败: entity %s (embed_entity 返回 False)", entity_id)
-    except Exception as e:
-        logger.error("向量化异常: entity %s: %s", entity_id, e, exc_info=True)
+    if embed:
+        try:
+            from app.services.embedding_service import embed_entity
+            embed_ok = await embed_entity(entity_id)
+            if not embed_ok:
+                logger.error("向量化失败: entity %s (embed_entity 返回 False)", entity_id)
+        except Exception as e:
+            logger.error("向量化异常: entity %s: %s", entity_id, e, exc_info=True)
 
     try:
         from app.services.entity_extractor import extract_and_store
@@ -215,10 +278,11 @@ async def approve_item(review_id: str, modifications: dict | None = None) -> dic
         entity_id, embed_ok, extract_status,
     )
 
-    action["embed_status"] = "ok" if embed_ok else "failed"
-    action["extract_status"] = extract_status
+    if embed_ok:
+        query_cache.clear()
 
-    logger.info("Approved review %s (status: %s) for entity %s", review_id, status, entity_id)
+    action["embed_status"] = ("ok" if embed_ok else "failed") if embed else "deferred"
+    action["extract_status"] = extract_status
     return action
 
 
@@ -233,55 +297,71 @@ async def reject_item(review_id: str, reason: str = "") -> None:
         (action, review_id),
     )
     await db.commit()
+    invalidate_counts()
     logger.info("Rejected review %s", review_id)
 
 
 async def batch_approve(review_ids: list[str]) -> int:
     """Approve multiple review items at once. Returns count of approved items."""
-    count = 0
+    # 落库逐条进行：每条审核是写线程上的一个独立事务，失败只回滚自身
+    approved: list[tuple] = []
     for rid in review_ids:
         try:
-            await approve_item(rid)
-            count += 1
+            approved.append(await _approve_and_log(rid))
         except Exception as e:
             logger.warning("Failed to approve %s: %s", rid, e)
-    return count
 
+    # 后处理耗时主要在笔记移动与图谱抽取（文件/LLM/Neo4j I/O），有限并发重叠这些等待
+    sem = asyncio.Semaphore(_BATCH_APPROVE_CONCURRENCY)
 
-async def _apply_tags_to_entity(
+    async def _post_one(item: tuple) -> None:
+        async with sem:
+            await _after_approve(*item, embed=False)
+
+    outcomes = await asyncio.gather(*(_post_one(item) for item in approved), return_exceptions=True)
+    for item, outcome in zip(approved, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning("Post-approval processing failed for entity %s: %s", item[0]["entity_id"], outcome)
+    entity_ids = [item[0]["entity_id"] for item in approved]
+
+    # 向量化合并为一次 embedding 请求 + 一次 Milvus upsert
+    if entity_ids:
+        from app.services.embedding_service import embed_entities
+        embedded = await embed_entities(entity_ids)
+        if len(embedded) < len(entity_ids):
+            logger.error("批量向量化: %d/%d 成功", len(embedded), len(entity_ids))
+        if embedded:
+            query_cache.clear()
+    return len(entity_ids)
+
+
+def _apply_tags_to_entity(
+    conn: sqlite3.Connection,
     entity_id: str,
     folder_tags: list[str],
     content_tags: list[str],
     status_values: dict,
 ):
-    """Write approved tags to entity_tags table."""
-    db = await get_db()
+    """Write approved tags to entity_tags table (runs inside the approval transaction)."""
+    content_json = json.dumps(content_tags, ensure_ascii=False)
+    status_json = json.dumps(status_values, ensure_ascii=False)
 
     if folder_tags:
         for folder_path in folder_tags:
-            cursor = await db.execute("SELECT id FROM tag_tree WHERE path = ?", (folder_path,))
-            row = await cursor.fetchone()
+            row = conn.execute("SELECT id FROM tag_tree WHERE path = ?", (folder_path,)).fetchone()
             if row:
-                tag_tree_id = row["id"]
-                await db.execute(
+                conn.execute(
                     """INSERT OR REPLACE INTO entity_tags
                        (entity_id, tag_tree_id, content_tag_ids, status_values, created_at)
                        VALUES (?, ?, ?, ?, datetime('now'))""",
-                    (
-                        entity_id,
-                        tag_tree_id,
-                        json.dumps(content_tags, ensure_ascii=False),
-                        json.dumps(status_values, ensure_ascii=False),
-                    ),
+                    (entity_id, row["id"], content_json, status_json),
                 )
     elif content_tags or status_values:
-        await db.execute(
-            """INSERT OR REPLACE INTO entity_tags
+        # 无文件夹标签时 tag_tree_id 为 NULL（外键不允许占位 id）；NULL 不参与主键去重，先删后插
+        conn.execute("DELETE FROM entity_tags WHERE entity_id = ? AND tag_tree_id IS NULL", (entity_id,))
+        conn.execute(
+            """INSERT INTO entity_tags
                (entity_id, tag_tree_id, content_tag_ids, status_values, created_at)
-               VALUES (?, '__untagged__', ?, ?, datetime('now'))""",
-            (
-                entity_id,
-                json.dumps(content_tags, ensure_ascii=False),
-                json.dumps(status_values, ensure_ascii=False),
-            ),
+               VALUES (?, NULL, ?, ?, datetime('now'))""",
+            (entity_id, content_json, status_json),
         )
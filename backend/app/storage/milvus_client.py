@@ -110,6 +110,27 @@ async def upsert_vector(
 ) -> None:
     """Insert or update a single entity vector."""
     client = await get_milvus()
+    data = vector_row(entity_id, embedding, text_preview, source, extra_fields)
+    client.upsert(collection_name=COLLECTION_NAME, data=[data])
+    logger.debug("Upserted vector for entity %s", entity_id)
+
+
+async def upsert_vectors(rows: list[dict[str, Any]]) -> None:
+    """Insert or update many entity vectors (built with vector_row) in one RPC."""
+    if not rows:
+        return
+    client = await get_milvus()
+    client.upsert(collection_name=COLLECTION_NAME, data=rows)
+    logger.debug("Upserted %d vectors", len(rows))
+
+
+def vector_row(
+    entity_id: str,
+    embedding: list[float],
+    text_preview: str = "",
+    source: str = "",
+    extra_fields: dict[str, Any] | None = None,
+) -> dict[str, Any]:
     data = {
         ID_FIELD: entity_id,
         VECTOR_FIELD: embedding,
@@ -118,9 +139,7 @@ async def upsert_vector(
     }
     if extra_fields:
         data.update(extra_fields)
-
-    client.upsert(collection_name=COLLECTION_NAME, data=[data])
-    logger.debug("Upserted vector for entity %s", entity_id)
+    return data
 
 
 async def search_vectors(
@@ -2,15 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+import sqlite3
 import aiosqlite
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from contextlib import asynccontextmanager
+from typing import TypeVar
 
 from app.config import get_settings
 
+T = TypeVar("T")
+
 _db_connection: aiosqlite.Connection | None = None
 
+# 只读连接池（见 read_db）
+_read_pool: asyncio.Queue[aiosqlite.Connection] | None = None
+_read_connections: list[aiosqlite.Connection] = []
+
+# 多语句写事务：单线程执行器上的同步 sqlite3 连接，一次线程切换完成全部 SQL + commit
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+_sync_connection: sqlite3.Connection | None = None
+
+# sqlite3 按 SQL 文本缓存已编译语句；默认 128 条不够覆盖全部路由的字面量 SQL
+STATEMENT_CACHE_SIZE = 512
+
+# 每个连接建立时执行一次：WAL 下 synchronous=NORMAL 提交时不再 fsync（仅 checkpoint 时刷盘）
+_CONNECT_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    # 主连接与写线程连接都会写库：撞锁时等待而不是立刻报 database is locked
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+)
+
 
 def ensure_data_dir_writable() -> None:
     """启动前检查数据目录可写，不可写则抛出明确错误（最佳实践：必须先可写再启动）。"""
@@ -34,28 +64,114 @@ def ensure_data_dir_writable() -> None:
 
 
 async def get_db() -> aiosqlite.Connection:
-    global _db_connection
-    if _db_connection is not None:
-        try:
-            await _db_connection.execute("SELECT 1")
-        except Exception:
-            _db_connection = None
+    """进程内共享的长连接：首次调用时打开，close_db() 时关闭。
 
+    不再每次调用都 SELECT 1 探活：那会给每个请求多一次线程往返，
+    而本地文件连接不会被对端断开。
+    """
+    global _db_connection
     if _db_connection is None:
+        _db_connection = await _open_connection()
+    return _db_connection
+
+
+async def _open_connection() -> aiosqlite.Connection:
+    settings = get_settings()
+    settings.resolved_data_dir.mkdir(parents=True, exist_ok=True)
+    conn = await aiosqlite.connect(str(settings.db_path), cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = aiosqlite.Row
+    for pragma in _CONNECT_PRAGMAS:
+        await conn.execute(pragma)
+    return conn
+
+
+@asynccontextmanager
+async def read_db():
+    """借用只读连接池中的一个连接。
+
+    get_db() 的共享连接上所有语句串行执行；WAL 下多个读连接可并行读取且不阻塞写入，
+    适合搜索、统计等只读热点路径。
+    """
+    global _read_pool
+    if _read_pool is None:
+        _read_pool = asyncio.Queue()
+        for _ in range(get_settings().sqlite_read_pool_size):
+            conn = await _open_connection()
+            await conn.execute("PRAGMA query_only=ON")
+            _read_connections.append(conn)
+            _read_pool.put_nowait(conn)
+    conn = await _read_pool.get()
+    try:
+        yield conn
+    finally:
+        _read_pool.put_nowait(conn)
+
+
+def _get_sync_connection() -> sqlite3.Connection:
+    """Lazily open the writer connection. Only called on the sqlite-write thread."""
+    global _sync_connection
+    if _sync_connection is None:
         settings = get_settings()
         settings.resolved_data_dir.mkdir(parents=True, exist_ok=True)
-        _db_connection = await aiosqlite.connect(str(settings.db_path))
-        _db_connection.row_factory = aiosqlite.Row
-        await _db_connection.execute("PRAGMA journal_mode=WAL")
-        await _db_connection.execute("PRAGMA foreign_keys=ON")
-    return _db_connection
+        conn = sqlite3.connect(
+            str(settings.db_path), cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECT_PRAGMAS:
+            conn.execute(pragma)
+        _sync_connection = conn
+    return _sync_connection
+
+
+def _close_sync_connection() -> None:
+    global _sync_connection
+    if _sync_connection is not None:
+        _sync_connection.close()
+        _sync_connection = None
+
+
+async def run_sync(fn: Callable[[sqlite3.Connection], T]) -> T:
+    """在专用写线程里执行 fn(conn) 并提交，异常时回滚。
+
+    适合多条写语句的事务：所有 SQL 在同一次线程切换内完成，避免 aiosqlite 每条语句一次往返。
+    fn 中读取 RETURNING 结果时须取完所有行，否则 commit 会因语句未结束而失败。
+    """
+    def _run() -> T:
+        conn = _get_sync_connection()
+        try:
+            result = fn(conn)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+
+    return await asyncio.get_running_loop().run_in_executor(_write_executor, _run)
 
 
 async def close_db():
-    global _db_connection
+    global _db_connection, _read_pool
     if _db_connection:
         await _db_connection.close()
         _db_connection = None
+    for conn in _read_connections:
+        await conn.close()
+    _read_connections.clear()
+    _read_pool = None
+    await asyncio.get_running_loop().run_in_executor(_write_executor, _close_sync_connection)
+
+
+async def vacuum_db() -> None:
+    """VACUUM 后立即重建全文索引。
+
+    entities 没有 INTEGER PRIMARY KEY，VACUUM 可能重新编号其隐式 rowid，
+    而 entities_fts 正是按 rowid 关联；不重建会让关键词检索静默返回错误实体。
+    """
+    def _vacuum(conn: sqlite3.Connection) -> None:
+        conn.execute("VACUUM")
+        conn.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
+
+    await run_sync(_vacuum)
 
 
 @asynccontextmanager
@@ -119,6 +235,8 @@ CREATE TABLE IF NOT EXISTS tag_tree (
 
 CREATE INDEX IF NOT EXISTS idx_tag_tree_parent ON tag_tree(parent_id);
 CREATE INDEX IF NOT EXISTS idx_tag_tree_path ON tag_tree(path);
+-- 标签树列表按 (sort_order, name) 排序，索引顺序扫描免去临时排序
+CREATE INDEX IF NOT EXISTS idx_tag_tree_order ON tag_tree(sort_order, name);
 
 -- ============================================
 -- 扁平内容标签
@@ -132,6 +250,9 @@ CREATE TABLE IF NOT EXISTS content_tags (
     created_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
+-- 覆盖索引：内容标签列表按使用次数排序，所需列均在索引内，无需回表
+CREATE INDEX IF NOT EXISTS idx_content_tags_usage ON content_tags(usage_count DESC, name, id, color, created_at);
+
 -- ============================================
 -- 状态标签维度
 -- ============================================
@@ -172,6 +293,29 @@ CREATE TABLE IF NOT EXISTS entities (
 
 CREATE INDEX IF NOT EXISTS idx_entities_source ON entities(source);
 CREATE INDEX IF NOT EXISTS idx_entities_review ON entities(review_status);
+CREATE INDEX IF NOT EXISTS idx_entities_source_updated ON entities(source, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_entities_source_sid ON entities(source, source_id);
+
+-- 标题/正文全文索引（外部内容表，由触发器与 entities 同步）
+-- trigram 分词支持中文等无空格文本的子串匹配，语义与 LIKE '%q%' 一致
+-- 注意：索引按 entities 的隐式 rowid 关联（主键是 TEXT id）；VACUUM 可能重排隐式 rowid，
+-- 之后必须执行 'rebuild'，否则检索会指向错误的实体。压缩数据库请用 vacuum_db()。
+CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+    title, content, content='entities', content_rowid='rowid', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS entities_fts_ai AFTER INSERT ON entities BEGIN
+    INSERT INTO entities_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entities_fts_ad AFTER DELETE ON entities BEGIN
+    INSERT INTO entities_fts(entities_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS entities_fts_au AFTER UPDATE OF title, content ON entities BEGIN
+    INSERT INTO entities_fts(entities_fts, rowid, title, content) VALUES ('delete', old.rowid, old.title, old.content);
+    INSERT INTO entities_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+END;
 CREATE INDEX IF NOT EXISTS idx_entities_created_by ON entities(created_by);
 
 -- ============================================
@@ -270,6 +414,23 @@ CREATE TABLE IF NOT EXISTS config_changelog (
     changed_at TEXT NOT NULL DEFAULT (datetime('now'))
 );
 
+-- ============================================
+-- 同步任务（多 worker 共享状态；running 部分唯一索引即每个来源的互斥锁）
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS sync_jobs (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_jobs_running ON sync_jobs(source) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_source_finished ON sync_jobs(source, finished_at);
+
 -- ============================================
 -- 对话
 -- ============================================
@@ -296,11 +457,21 @@ CREATE TABLE IF NOT EXISTS messages (
 );
 
 CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created ON messages(conversation_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at);
 """
 
 
 async def init_db():
     ensure_data_dir_writable()
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        # 写接口依赖 RETURNING（3.35+）
+        raise RuntimeError(f"SQLite 版本过低: {sqlite3.sqlite_version}，需要 3.35 及以上")
     db = await get_db()
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE name = 'entities_fts'")
+    fts_exists = await cursor.fetchone() is not None
     await db.executescript(SCHEMA_SQL)
+    if not fts_exists:
+        # 旧库首次创建全文索引时回填已有实体
+        await db.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
     await db.commit()
@@ -7,6 +7,9 @@ import logging
 import subprocess
 from dataclasses import dataclass
 
+from app.sync.apple_common import run_jxa
+from app.sync.messages import AppleJXAError
+
 logger = logging.getLogger(__name__)
 
 
@@ -117,13 +120,10 @@ async def fetch_all_events(
     """Fetch calendar events from Apple Calendar via JXA. Optional time range (days_back/days_forward from now)."""
     script = _build_jxa_script(limit=limit, order=order, days_back=days_back, days_forward=days_forward)
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", script],
-            capture_output=True, text=True, timeout=120,
-        )
+        result = await run_jxa(script, timeout=120, app="Calendar")
         if result.returncode != 0:
             logger.error("JXA Calendar error: %s", result.stderr)
-            raise RuntimeError(f"Apple Calendar JXA failed: {result.stderr[:300]}")
+            raise AppleJXAError(f"Apple Calendar: JXA failed: {result.stderr[:300]}")
 
         stdout = result.stdout.strip()
         if not stdout:
@@ -131,9 +131,11 @@ async def fetch_all_events(
         raw = json.loads(stdout)
     except json.JSONDecodeError as e:
         logger.error("Failed to parse JXA output: %s", e)
-        raise RuntimeError("Apple Calendar: invalid JXA output") from e
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Apple Calendar: JXA script timed out (>120s)")
+        raise AppleJXAError("Apple Calendar: invalid JXA output") from e
+    except subprocess.TimeoutExpired as e:
+        raise AppleJXAError("Apple Calendar: JXA script timed out (>120s)") from e
+    except OSError as e:
+        raise AppleJXAError(f"Apple Calendar: osascript unavailable ({e})") from e
 
     events: list[AppleCalendarEvent] = []
     for item in raw:
@@ -182,17 +184,17 @@ async def create_event(
     script = CREATE_EVENT_JXA.format(**escaped)
 
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", script],
-            capture_output=True, text=True, timeout=30,
-        )
+        result = await run_jxa(script, timeout=30, app="Calendar")
         if result.returncode != 0:
-            raise RuntimeError(f"Failed to create event: {result.stderr[:300]}")
+            raise AppleJXAError(f"Failed to create event: {result.stderr[:300]}")
 
         stdout = result.stdout.strip()
         if stdout:
             return json.loads(stdout)
         return {"status": "created", "title": title}
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error("Create calendar event failed: %s", e)
+        raise AppleJXAError(f"Failed to create event: {e}") from e
     except Exception as e:
         logger.error("Create calendar event failed: %s", e)
         raise
@@ -1,4 +1,13 @@
-"""Shared constants for Apple sync (JXA)."""
+"""Shared constants and the osascript runner for Apple sync (JXA)."""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.sync.messages import AppleJXAError
 
 # 用户可见提示：JXA 失败时前端与 Agent 统一展示
 JXA_USER_MESSAGE = (
@@ -6,11 +15,26 @@ JXA_USER_MESSAGE = (
     "若在非 Mac 环境或远程服务器运行，Apple 同步与创建功能不可用。"
 )
 
+# osascript 是阻塞调用：放到有界线程池执行，最多三个应用（备忘录/提醒事项/日历）各一个
+_jxa_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="osascript")
+# 同一应用的脚本串行执行，Apple 应用的脚本接口不支持并发访问
+_app_locks: dict[str, asyncio.Lock] = {}
+
+
+async def run_jxa(script: str, *, timeout: float, app: str) -> subprocess.CompletedProcess:
+    """Run a JXA script via osascript off the event loop; raises like subprocess.run."""
+    lock = _app_locks.setdefault(app, asyncio.Lock())
+    async with lock:
+        return await asyncio.get_running_loop().run_in_executor(
+            _jxa_executor,
+            partial(
+                subprocess.run,
+                ["osascript", "-l", "JavaScript", "-e", script],
+                capture_output=True, text=True, timeout=timeout,
+            ),
+        )
+
 
 def is_apple_jxa_error(e: BaseException) -> bool:
     """判断是否为 Apple JXA 相关错误（用于返回统一用户提示）。"""
-    msg = str(e).lower()
-    return any(
-        x in msg
-        for x in ("jxa", "apple notes", "apple reminders", "apple calendar", "osascript", "timed out")
-    )
+    return isinstance(e, AppleJXAError)
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import subprocess
 from dataclasses import dataclass, field
 from html.parser import HTMLParser
 
+from app.sync.apple_common import run_jxa
+from app.sync.messages import AppleJXAError
+
 logger = logging.getLogger(__name__)
 
 
@@ -147,10 +151,7 @@ class AppleNote:
 async def list_note_folders() -> list[str]:
     """List Apple Notes folder names (for user to choose which to sync)."""
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", LIST_FOLDERS_JXA],
-            capture_output=True, text=True, timeout=15,
-        )
+        result = await run_jxa(LIST_FOLDERS_JXA, timeout=15, app="Notes")
         if result.returncode != 0:
             logger.warning("JXA list folders error: %s", result.stderr)
             return []
@@ -163,17 +164,30 @@ async def list_note_folders() -> list[str]:
         return []
 
 
+def _parse_notes(raw: list[dict]) -> list[AppleNote]:
+    notes: list[AppleNote] = []
+    for item in raw:
+        body_html = item.get("body", "")
+        notes.append(AppleNote(
+            id=item["id"],
+            name=item.get("name", "Untitled"),
+            body_html=body_html,
+            body_text=html_to_text(body_html),
+            folder=item.get("folder", "Notes"),
+            creation_date=item.get("creationDate", ""),
+            modification_date=item.get("modificationDate", ""),
+        ))
+    return notes
+
+
 async def fetch_all_notes(limit: int = 50, order: str = "newest", folder_whitelist: list[str] | None = None) -> list[AppleNote]:
     """Fetch notes from Apple Notes via JXA with limit, ordering, and optional folder filter."""
     script = _build_jxa_script(limit=limit, order=order, folder_whitelist=folder_whitelist)
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", script],
-            capture_output=True, text=True, timeout=120,
-        )
+        result = await run_jxa(script, timeout=120, app="Notes")
         if result.returncode != 0:
             logger.error("JXA Notes error: %s", result.stderr)
-            raise RuntimeError(f"Apple Notes JXA failed: {result.stderr[:300]}")
+            raise AppleJXAError(f"Apple Notes: JXA failed: {result.stderr[:300]}")
 
         stdout = result.stdout.strip()
         if not stdout:
@@ -182,22 +196,14 @@ async def fetch_all_notes(limit: int = 50, order: str = "newest", folder_whiteli
         raw = json.loads(stdout)
     except json.JSONDecodeError as e:
         logger.error("Failed to parse JXA output (len=%d): %s", len(result.stdout), e)
-        raise RuntimeError("Apple Notes: invalid JXA output") from e
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Apple Notes: JXA script timed out (>120s)")
+        raise AppleJXAError("Apple Notes: invalid JXA output") from e
+    except subprocess.TimeoutExpired as e:
+        raise AppleJXAError("Apple Notes: JXA script timed out (>120s)") from e
+    except OSError as e:
+        raise AppleJXAError(f"Apple Notes: osascript unavailable ({e})") from e
 
-    notes: list[AppleNote] = []
-    for item in raw:
-        body_html = item.get("body", "")
-        notes.append(AppleNote(
-            id=item["id"],
-            name=item.get("name", "Untitled"),
-            body_html=body_html,
-            body_text=html_to_text(body_html),
-            folder=item.get("folder", "Notes"),
-            creation_date=item.get("creationDate", ""),
-            modification_date=item.get("modificationDate", ""),
-        ))
+    # HTML 转文本是纯 CPU 工作（单条正文可达 50KB），放到线程里避免阻塞事件循环
+    notes = await asyncio.to_thread(_parse_notes, raw)
 
     logger.info("Fetched %d notes from Apple Notes (limit=%d, order=%s)", len(notes), limit, order)
     return notes
@@ -219,18 +225,18 @@ async def create_note(title: str, body: str, folder: str = "") -> dict:
     script = CREATE_NOTE_JXA.format(title=escaped_title, body=escaped_body, folder=escaped_folder)
 
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", script],
-            capture_output=True, text=True, timeout=30,
-        )
+        result = await run_jxa(script, timeout=30, app="Notes")
         if result.returncode != 0:
             logger.error("Create note JXA error: %s", result.stderr)
-            raise RuntimeError(f"Failed to create note: {result.stderr[:300]}")
+            raise AppleJXAError(f"Failed to create note: {result.stderr[:300]}")
 
         stdout = result.stdout.strip()
         if stdout:
             return json.loads(stdout)
         return {"status": "created", "title": title}
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error("Create note failed: %s", e)
+        raise AppleJXAError(f"Failed to create note: {e}") from e
     except Exception as e:
         logger.error("Create note failed: %s", e)
         raise
@@ -7,6 +7,9 @@ import logging
 import subprocess
 from dataclasses import dataclass, field
 
+from app.sync.apple_common import run_jxa
+from app.sync.messages import AppleJXAError
+
 logger = logging.getLogger(__name__)
 
 
@@ -112,10 +115,7 @@ class AppleReminder:
 async def list_reminder_lists() -> list[str]:
     """List Apple Reminders list names (for user to choose which to sync)."""
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", LIST_LISTS_JXA],
-            capture_output=True, text=True, timeout=15,
-        )
+        result = await run_jxa(LIST_LISTS_JXA, timeout=15, app="Reminders")
         if result.returncode != 0:
             return []
         raw = result.stdout.strip()
@@ -157,13 +157,10 @@ async def fetch_all_reminders(
     """Fetch reminders via JXA with optional list filter and due date range (filtered in Python)."""
     script = _build_jxa_script(limit=min(limit * 2, 200), order=order, list_whitelist=list_names)
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", script],
-            capture_output=True, text=True, timeout=120,
-        )
+        result = await run_jxa(script, timeout=120, app="Reminders")
         if result.returncode != 0:
             logger.error("JXA Reminders error: %s", result.stderr)
-            raise RuntimeError(f"Apple Reminders JXA failed: {result.stderr[:300]}")
+            raise AppleJXAError(f"Apple Reminders: JXA failed: {result.stderr[:300]}")
 
         stdout = result.stdout.strip()
         if not stdout:
@@ -171,9 +168,11 @@ async def fetch_all_reminders(
         raw = json.loads(stdout)
     except json.JSONDecodeError as e:
         logger.error("Failed to parse JXA output: %s", e)
-        raise RuntimeError("Apple Reminders: invalid JXA output") from e
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Apple Reminders: JXA script timed out (>120s)")
+        raise AppleJXAError("Apple Reminders: invalid JXA output") from e
+    except subprocess.TimeoutExpired as e:
+        raise AppleJXAError("Apple Reminders: JXA script timed out (>120s)") from e
+    except OSError as e:
+        raise AppleJXAError(f"Apple Reminders: osascript unavailable ({e})") from e
 
     reminders = []
     for item in raw:
@@ -222,17 +221,17 @@ async def create_reminder(title: str, body: str = "", list_name: str = "", due_d
     )
 
     try:
-        result = subprocess.run(
-            ["osascript", "-l", "JavaScript", "-e", script],
-            capture_output=True, text=True, timeout=30,
-        )
+        result = await run_jxa(script, timeout=30, app="Reminders")
         if result.returncode != 0:
-            raise RuntimeError(f"Failed to create reminder: {result.stderr[:300]}")
+            raise AppleJXAError(f"Failed to create reminder: {result.stderr[:300]}")
 
         stdout = result.stdout.strip()
         if stdout:
             return json.loads(stdout)
         return {"status": "created", "title": title}
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error("Create reminder failed: %s", e)
+        raise AppleJXAError(f"Failed to create reminder: {e}") from e
     except Exception as e:
         logger.error("Create reminder failed: %s", e)
         raise
@@ -5,18 +5,22 @@ This is the central orchestrator that connects all Phase 2 components.
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
+import sqlite3
 import uuid
+from pathlib import Path
 
-from app.storage.sqlite_client import get_db
+from app.storage.sqlite_client import get_db, run_sync
 from app.sync.obsidian_writer import (
     write_note_to_vault,
     note_from_apple_note,
     note_from_apple_reminder,
     note_from_apple_event,
 )
+from app.services.query_cache import query_cache
 from app.services.tag_engine import suggest_tags
 from app.services.review_service import create_review_item
 
@@ -80,35 +84,31 @@ async def ingest_entity(
     except Exception as e:
         logger.warning("Failed to write Obsidian note for '%s': %s", title, e)
 
-    # Step 2: Create entity
-    await db.execute(
-        """INSERT INTO entities
-           (id, source, source_id, title, content, content_type,
-            obsidian_path, file_path, metadata, current_version,
-            review_status, content_hash, created_by, created_at, updated_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 'pending', ?, ?, datetime('now'), datetime('now'))""",
-        (
-            entity_id, source, source_id, title, content, content_type,
-            obsidian_path, file_path,
-            json.dumps(metadata, ensure_ascii=False) if metadata else None,
-            c_hash, created_by,
-        ),
-    )
-
-    # Step 3: Create initial version
+    # Step 2 & 3: Create entity + initial version（写线程内同一事务，一次提交）
+    metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
     version_id = str(uuid.uuid4())
-    await db.execute(
-        """INSERT INTO entity_versions
-           (id, entity_id, version_number, title, content, metadata,
-            change_source, change_summary, created_at)
-           VALUES (?, ?, 1, ?, ?, ?, ?, '初始版本', datetime('now'))""",
-        (
-            version_id, entity_id, title, content,
-            json.dumps(metadata, ensure_ascii=False) if metadata else None,
-            source,
-        ),
-    )
-    await db.commit()
+
+    def _insert(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """INSERT INTO entities
+               (id, source, source_id, title, content, content_type,
+                obsidian_path, file_path, metadata, current_version,
+                review_status, content_hash, created_by, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, 'pending', ?, ?, datetime('now'), datetime('now'))""",
+            (
+                entity_id, source, source_id, title, content, content_type,
+                obsidian_path, file_path, metadata_json, c_hash, created_by,
+            ),
+        )
+        conn.execute(
+            """INSERT INTO entity_versions
+               (id, entity_id, version_number, title, content, metadata,
+                change_source, change_summary, created_at)
+               VALUES (?, ?, 1, ?, ?, ?, ?, '初始版本', datetime('now'))""",
+            (version_id, entity_id, title, content, metadata_json, source),
+        )
+
+    await run_sync(_insert)
 
     # Step 4 & 5: LLM tag suggestion + review queue
     suggestion = {
@@ -132,6 +132,8 @@ async def ingest_entity(
     except Exception as e:
         logger.warning("Failed to create review item for '%s': %s", title, e)
 
+    query_cache.clear()
+
     return {
         "id": entity_id,
         "status": "created",
@@ -145,32 +147,33 @@ async def _update_existing_entity(
     entity_id: str, title: str, content: str, c_hash: str, metadata: dict | None,
 ) -> dict:
     """Update an existing entity with new content (new version)."""
-    db = await get_db()
+    metadata_json = json.dumps(metadata, ensure_ascii=False) if metadata else None
+    version_id = str(uuid.uuid4())
 
-    cursor = await db.execute("SELECT current_version FROM entities WHERE id = ?", (entity_id,))
-    row = await cursor.fetchone()
-    new_version = (row["current_version"] if row else 0) + 1
-
-    await db.execute(
-        """UPDATE entities SET title = ?, content = ?, content_hash = ?,
-           current_version = ?, updated_at = datetime('now'),
-           metadata = COALESCE(?, metadata)
-           WHERE id = ?""",
-        (title, content, c_hash, new_version,
-         json.dumps(metadata, ensure_ascii=False) if metadata else None,
-         entity_id),
-    )
+    # 读版本号、更新实体、写版本快照在写线程内一次完成，并发同步不会拿到相同版本号
+    def _update(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT current_version FROM entities WHERE id = ?", (entity_id,)).fetchone()
+        new_version = (row["current_version"] if row else 0) + 1
+        conn.execute(
+            """UPDATE entities SET title = ?, content = ?, content_hash = ?,
+               current_version = ?, updated_at = datetime('now'),
+               metadata = COALESCE(?, metadata)
+               WHERE id = ?""",
+            (title, content, c_hash, new_version, metadata_json, entity_id),
+        )
+        conn.execute(
+            """INSERT INTO entity_versions
+               (id, entity_id, version_number, title, content, metadata,
+                change_source, change_summary, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, 'sync', '同步更新', datetime('now'))""",
+            (version_id, entity_id, new_version, title, content, metadata_json),
+        )
+        return new_version
 
-    version_id = str(uuid.uuid4())
-    await db.execute(
-        """INSERT INTO entity_versions
-           (id, entity_id, version_number, title, content, metadata,
-            change_source, change_summary, created_at)
-           VALUES (?, ?, ?, ?, ?, ?, 'sync', '同步更新', datetime('now'))""",
-        (version_id, entity_id, new_version, title, content,
-         json.dumps(metadata, ensure_ascii=False) if metadata else None),
-    )
-    await db.commit()
+    new_version = await run_sync(_update)
+
+    # 已索引实体的内容变了，缓存的检索结果可能带着旧正文
+    query_cache.clear()
 
     logger.info("Updated entity %s to version %d", entity_id, new_version)
     return {"id": entity_id, "status": "updated", "version": new_version}
@@ -256,10 +259,26 @@ async def ingest_uploaded_file(
     original_filename: str,
     content_type: str,
     created_by: str = "upload",
+    file_sha: str | None = None,
 ) -> dict:
-    """Process an uploaded file through the ingestion pipeline."""
+    """Process an uploaded file through the ingestion pipeline.
+
+    file_sha (SHA-256 of the file bytes) is stored as the entity's source_id; re-uploading
+    identical bytes is skipped before the (possibly expensive) text extraction.
+    """
     from app.services.file_processor import extract_text, detect_content_type
 
+    if file_sha:
+        db = await get_db()
+        cursor = await db.execute(
+            "SELECT id FROM entities WHERE source = 'upload' AND source_id = ? LIMIT 1", (file_sha,),
+        )
+        existing = await cursor.fetchone()
+        if existing:
+            logger.info("Skipping duplicate upload %s (same bytes as entity %s)", original_filename, existing["id"])
+            await asyncio.to_thread(Path(file_path).unlink, missing_ok=True)
+            return {"id": existing["id"], "status": "skipped", "reason": "duplicate_file"}
+
     text = await extract_text(file_path, content_type)
     ct = detect_content_type(original_filename)
     title = original_filename.rsplit(".", 1)[0] if "." in original_filename else original_filename
@@ -268,6 +287,7 @@ async def ingest_uploaded_file(
         title=title,
         content=text,
         source="upload",
+        source_id=file_sha,
         content_type=ct,
         file_path=file_path,
         folder="Resources/Uploads",
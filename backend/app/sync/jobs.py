@@ -0,0 +1,180 @@
+"""Sync job state persisted in SQLite so every worker sees the same running/last-result view.
+
+A source is locked while it has a row with status 'running'; the partial unique index
+idx_sync_jobs_running makes claiming the lock a single atomic INSERT across processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+import orjson
+
+from app.config import get_user_config
+from app.services import config_writer
+from app.storage.sqlite_client import get_db, run_sync
+from app.sync.messages import APPLE_JXA_USER_MESSAGE, AppleJXAError
+
+logger = logging.getLogger(__name__)
+
+# 进程崩溃等原因遗留的 running 记录超过该时长视为失效，可被重新认领
+STALE_AFTER = timedelta(hours=1)
+# 仅保留最近的任务记录
+KEEP_JOBS = 100
+
+# 运行中的后台同步任务；持有 Task 引用防止被 GC 提前回收（任务状态本身在 SQLite sync_jobs 表）
+_tasks: set[asyncio.Task] = set()
+
+
+async def claim(source: str) -> str | None:
+    """Claim the source's sync lock and record a running job. Returns the job id, or None if already running."""
+    job_id = str(uuid.uuid4())
+    now = datetime.now()
+
+    def _claim(conn: sqlite3.Connection) -> str | None:
+        conn.execute(
+            "UPDATE sync_jobs SET status = 'error', error = '任务超时未完成', finished_at = ? "
+            "WHERE source = ? AND status = 'running' AND started_at < ?",
+            (now.isoformat(), source, (now - STALE_AFTER).isoformat()),
+        )
+        try:
+            conn.execute(
+                "INSERT INTO sync_jobs (id, source, status, started_at) VALUES (?, ?, 'running', ?)",
+                (job_id, source, now.isoformat()),
+            )
+        except sqlite3.IntegrityError:
+            return None
+        conn.execute(
+            "DELETE FROM sync_jobs WHERE id NOT IN (SELECT id FROM sync_jobs ORDER BY started_at DESC LIMIT ?)",
+            (KEEP_JOBS,),
+        )
+        return job_id
+
+    return await run_sync(_claim)
+
+
+async def finish(job_id: str, *, result: dict | None = None, error: str | None = None) -> None:
+    """Record the job outcome and release the source lock."""
+    await run_sync(lambda conn: conn.execute(
+        "UPDATE sync_jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+        (
+            "error" if error is not None else "done",
+            orjson.dumps(result).decode() if result is not None else None,
+            error,
+            datetime.now().isoformat(),
+            job_id,
+        ),
+    ))
+
+
+async def expire_running() -> None:
+    """Startup: mark every 'running' job as interrupted.
+
+    SQLite 只在单机上使用，启动时不可能有其他进程仍在执行这些任务；不清理会让该来源被锁到 STALE_AFTER。
+    """
+    await run_sync(lambda conn: conn.execute(
+        "UPDATE sync_jobs SET status = 'error', error = '服务重启，任务中断', finished_at = ? WHERE status = 'running'",
+        (datetime.now().isoformat(),),
+    ))
+
+
+def _summarize_results(results: list[dict]) -> dict:
+    counts = Counter(r.get("status") for r in results)
+    return {
+        "total": len(results),
+        "created": counts["created"],
+        "updated": counts["updated"],
+        "skipped": counts["skipped"],
+    }
+
+
+async def start(source: str, kwargs: dict, *, scope: dict | None = None) -> str | None:
+    """Claim the source's lock and launch its ingest as a background task.
+
+    Returns the job id, or None if the source is already syncing (in any worker).
+    Manual triggers and the scheduler both go through here, so one source never ingests twice at once.
+    """
+    job_id = await claim(source)
+    if job_id is None:
+        return None
+    task = asyncio.create_task(_run(job_id, source, kwargs, scope))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
+
+
+async def cancel_all() -> None:
+    """Shutdown: cancel running sync tasks and wait until each has recorded its outcome."""
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run(job_id: str, source: str, kwargs: dict, scope: dict | None) -> None:
+    from app.sync.ingest_pipeline import (
+        ingest_apple_notes, ingest_apple_reminders, ingest_apple_calendar,
+    )
+    fn_map = {
+        "apple_notes": ingest_apple_notes,
+        "apple_reminders": ingest_apple_reminders,
+        "apple_calendar": ingest_apple_calendar,
+    }
+    try:
+        results = await fn_map[source](**kwargs)
+        summary = _summarize_results(results)
+        if scope is not None:
+            user_config = get_user_config()
+            apple_cfg = user_config.get("apple_sync", {})
+            sync_scope = apple_cfg.get("sync_scope", {})
+            sync_scope[source] = scope
+            apple_cfg["sync_scope"] = sync_scope
+            await config_writer.submit("apple_sync", apple_cfg)
+    except asyncio.CancelledError:
+        await finish(job_id, error="同步任务被取消")
+        raise
+    except Exception as e:
+        logger.error("Sync %s failed: %s", source, e)
+        await finish(job_id, error=APPLE_JXA_USER_MESSAGE if isinstance(e, AppleJXAError) else str(e))
+    else:
+        await finish(job_id, result=summary)
+
+
+def _job_out(row) -> dict:
+    d = dict(row)
+    d["job_id"] = d.pop("id")
+    d["result"] = orjson.loads(d["result"]) if d["result"] else None
+    return d
+
+
+async def get_job(job_id: str) -> dict | None:
+    db = await get_db()
+    cursor = await db.execute("SELECT * FROM sync_jobs WHERE id = ?", (job_id,))
+    row = await cursor.fetchone()
+    return _job_out(row) if row is not None else None
+
+
+async def get_status(sources: tuple[str, ...]) -> dict:
+    """Per-source {running, job_id, last_run, last_result}, same shape as the old in-memory dict."""
+    status = {s: {"running": False, "last_run": None, "last_result": None, "job_id": None} for s in sources}
+    db = await get_db()
+    cursor = await db.execute("SELECT source, id FROM sync_jobs WHERE status = 'running'")
+    for row in await cursor.fetchall():
+        if row["source"] in status:
+            status[row["source"]].update(running=True, job_id=row["id"])
+    # SQLite 对带 MAX() 的聚合查询返回取得最大值那一行的裸列
+    cursor = await db.execute(
+        "SELECT source, result, MAX(finished_at) AS finished_at FROM sync_jobs WHERE status = 'done' GROUP BY source"
+    )
+    for row in await cursor.fetchall():
+        if row["source"] in status:
+            status[row["source"]].update(
+                last_run=row["finished_at"],
+                last_result=orjson.loads(row["result"]) if row["result"] else None,
+            )
+    return status
@@ -5,3 +5,7 @@ APPLE_JXA_USER_MESSAGE = (
     "请确保后端在本机 Mac 上运行，且已授予终端/应用对「备忘录」「提醒事项」「日历」的访问权限。"
     "若仍失败，请查看后端日志中的具体错误。"
 )
+
+
+class AppleJXAError(RuntimeError):
+    """osascript/JXA 调用失败（非 Mac、未授权、超时或输出异常）。"""
@@ -6,11 +6,7 @@ import asyncio
 import logging
 
 from app.config import get_user_config
-from app.sync.ingest_pipeline import (
-    ingest_apple_notes,
-    ingest_apple_reminders,
-    ingest_apple_calendar,
-)
+from app.sync import jobs as sync_jobs
 
 logger = logging.getLogger(__name__)
 
@@ -32,27 +28,32 @@ async def run_scheduled_sync() -> None:
         limit = int(opts.get("limit", 20))
         order = str(opts.get("order", "newest"))
 
+        kwargs: dict = {"limit": limit, "order": order}
+        if source_key == "notes":
+            folders = opts.get("folder_whitelist")
+            if isinstance(folders, str):
+                folders = [s.strip() for s in folders.split(",") if s.strip()] or None
+            kwargs["folder_whitelist"] = folders
+        elif source_key == "reminders":
+            lists = opts.get("list_names")
+            if isinstance(lists, str):
+                lists = [s.strip() for s in lists.split(",") if s.strip()] or None
+            kwargs.update(
+                list_names=lists,
+                due_after=opts.get("due_after") or None,
+                due_before=opts.get("due_before") or None,
+            )
+        elif source_key == "calendar":
+            kwargs.update(
+                days_back=int(opts.get("days_back", 30)),
+                days_forward=int(opts.get("days_forward", 90)),
+            )
+        else:
+            continue
+
+        # 与手动触发共用 sync_jobs 锁：同一来源正在同步时跳过本轮
         try:
-            if source_key == "notes":
-                folders = opts.get("folder_whitelist")
-                if isinstance(folders, str):
-                    folders = [s.strip() for s in folders.split(",") if s.strip()] or None
-                await ingest_apple_notes(limit=limit, order=order, folder_whitelist=folders)
-            elif source_key == "reminders":
-                lists = opts.get("list_names")
-                if isinstance(lists, str):
-                    lists = [s.strip() for s in lists.split(",") if s.strip()] or None
-                await ingest_apple_reminders(
-                    limit=limit, order=order,
-                    list_names=lists,
-                    due_after=opts.get("due_after") or None,
-                    due_before=opts.get("due_before") or None,
-                )
-            elif source_key == "calendar":
-                await ingest_apple_calendar(
-                    limit=limit, order=order,
-                    days_back=int(opts.get("days_back", 30)),
-                    days_forward=int(opts.get("days_forward", 90)),
-                )
+            if await sync_jobs.start(source, kwargs) is None:
+                logger.info("Scheduled sync %s skipped: already running", source)
         except Exception as e:
             logger.warning("Scheduled sync %s failed: %s", source, e)
@@ -1,4 +1,4 @@
-"""Database initialization script. Run: python scripts/init_db.py [--reset]"""
+"""Database initialization script. Run: python scripts/init_db.py [--reset] [--vacuum]"""
 
 import asyncio
 import sys
@@ -7,7 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from app.config import get_settings
-from app.storage.sqlite_client import init_db, get_db, close_db
+from app.storage.sqlite_client import init_db, get_db, close_db, vacuum_db
 
 
 async def main():
@@ -23,6 +23,11 @@ async def main():
     await init_db()
     print(f"数据库初始化完成: {settings.db_path}")
 
+    if "--vacuum" in sys.argv:
+        # 压缩后需重建全文索引，见 vacuum_db
+        await vacuum_db()
+        print("已压缩数据库并重建全文索引")
+
     db = await get_db()
     cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
     tables = await cursor.fetchall()
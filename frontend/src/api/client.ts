@@ -126,10 +126,12 @@ export const syncApi = {
     if (options.list_names?.length) p.set('list_names', options.list_names.join(','));
     if (options.due_after) p.set('due_after', options.due_after);
     if (options.due_before) p.set('due_before', options.due_before);
-    return api.post<SyncResult>(`/sync/trigger/${source}?${p}`, {});
+    return api.post<SyncJobStarted>(`/sync/trigger/${source}?${p}`, {});
   },
   triggerAll: (limit = 20, order = 'newest') =>
-    api.post<{ results: Record<string, unknown> }>(`/sync/trigger-all?limit=${limit}&order=${order}`, {}),
+    api.post<{ results: Record<string, { status: string; job_id?: string; detail?: string }> }>(
+      `/sync/trigger-all?limit=${limit}&order=${order}`, {}),
+  getJob: (jobId: string) => api.get<SyncJob>(`/sync/jobs/${jobId}`),
   upload: (file: File) => {
     const fd = new FormData();
     fd.append('file', file);
@@ -272,11 +274,11 @@ export interface SearchResponse {
 }
 export interface SearchResult {
   entity_id: string;
-  title: string | null;
-  content: string | null;
-  source: string | null;
-  obsidian_path: string | null;
-  distance: number | null;
+  title?: string;
+  content?: string;
+  source?: string;
+  obsidian_path?: string;
+  distance?: number;
   match_type: string;
 }
 export interface GraphStats { available: boolean; node_count: number; relationship_count: number; error?: string }
@@ -328,7 +330,7 @@ export interface SyncStatus {
     interval_minutes: number;
     sources: Record<string, boolean>;
   };
-  status: Record<string, { running: boolean; last_run: string | null; last_result: unknown }>;
+  status: Record<string, { running: boolean; last_run: string | null; last_result: unknown; job_id: string | null }>;
 }
 
 export interface SyncResult {
@@ -336,6 +338,17 @@ export interface SyncResult {
   results: { total: number; created: number; updated: number; skipped: number };
 }
 
+export interface SyncJobStarted { message: string; job_id: string }
+export interface SyncJob {
+  job_id: string;
+  source: string;
+  status: 'running' | 'done' | 'error';
+  result: SyncResult['results'] | null;
+  error: string | null;
+  started_at: string;
+  finished_at: string | null;
+}
+
 export interface User {
   id: string;
   username: string;
@@ -1,5 +1,5 @@
-import { useEffect, useState, useCallback } from 'react';
-import { syncApi, type SyncStatus, type SyncResult } from '../api/client';
+import { useEffect, useState, useCallback, useRef } from 'react';
+import { syncApi, type SyncStatus, type SyncResult, type SyncJob } from '../api/client';
 import { Upload, RefreshCw, Cloud, CheckCircle, XCircle, Loader2, Plus, ArrowUpDown } from 'lucide-react';
 
 const SOURCE_LABELS: Record<string, string> = {
@@ -9,6 +9,9 @@ const SOURCE_LABELS: Record<string, string> = {
 };
 
 const LIMIT_OPTIONS = [5, 10, 20, 50, 100, 200];
+const SYNC_POLL_INTERVAL_MS = 1500;
+// 单个同步任务的最长等待时间，超过后按失败展示（任务本身仍在后端继续）
+const SYNC_MAX_WAIT_MS = 10 * 60 * 1000;
 
 export default function Ingest() {
   const [syncStatus, setSyncStatus] = useState<SyncStatus | null>(null);
@@ -33,6 +36,12 @@ export default function Ingest() {
   const [creating, setCreating] = useState(false);
   const [createMsg, setCreateMsg] = useState('');
   const [showDataFlow, setShowDataFlow] = useState(false);
+  const mountedRef = useRef(true);
+
+  useEffect(() => {
+    mountedRef.current = true;
+    return () => { mountedRef.current = false; };
+  }, []);
 
   const reload = useCallback(() => {
     syncApi.getStatus().then(setSyncStatus).catch(() => {});
@@ -59,15 +68,31 @@ export default function Ingest() {
     return opts;
   };
 
+  // 同步在后端以后台任务执行，轮询任务状态直至结束；超时或页面卸载时停止轮询
+  const waitForJob = async (jobId: string): Promise<SyncJob> => {
+    const deadline = Date.now() + SYNC_MAX_WAIT_MS;
+    while (mountedRef.current) {
+      const job = await syncApi.getJob(jobId);
+      if (job.status !== 'running') return job;
+      if (Date.now() >= deadline) throw new Error('同步等待超时，请稍后刷新查看结果');
+      await new Promise(resolve => setTimeout(resolve, SYNC_POLL_INTERVAL_MS));
+    }
+    throw new Error('已离开页面，停止等待同步结果');
+  };
+
   const handleSync = async (source: string) => {
     const apiSource = `apple_${source}`;
     setSyncing(s => ({ ...s, [source]: true }));
     setSyncResults(r => ({ ...r, [source]: null }));
     try {
       const options = buildSyncOptions(source);
-      const result = await syncApi.trigger(apiSource, syncLimit, syncOrder, options);
-      const res = result?.results ?? emptyResults;
-      setSyncResults(r => ({ ...r, [source]: { message: result?.message ?? '', results: res } }));
+      const { job_id } = await syncApi.trigger(apiSource, syncLimit, syncOrder, options);
+      const job = await waitForJob(job_id);
+      if (job.status === 'error') throw new Error(job.error || '同步失败');
+      setSyncResults(r => ({
+        ...r,
+        [source]: { message: `${apiSource} sync completed`, results: job.result ?? emptyResults },
+      }));
       reload();
     } catch (e: unknown) {
       const msg = e instanceof Error ? e.message : '同步失败';
@@ -80,7 +105,9 @@ export default function Ingest() {
   const handleSyncAll = async () => {
     setSyncing({ notes: true, reminders: true, calendar: true });
     try {
-      await syncApi.triggerAll(syncLimit, syncOrder);
+      const { results } = await syncApi.triggerAll(syncLimit, syncOrder);
+      const jobIds = Object.values(results).flatMap(r => (r.job_id ? [r.job_id] : []));
+      await Promise.all(jobIds.map(id => waitForJob(id).catch(() => null)));
       reload();
     } catch {}
     setSyncing({});